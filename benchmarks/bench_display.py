@@ -0,0 +1,265 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: end-to-end benchmarks of the display pipeline
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Drives the update paths of selector/service, service and muc-oepnv/service against the
+fake info-beamer (and the MVG stand-in), so no Raspberry Pi or network access is needed:
+
+    bench_display.py [--max-latency-ms=N] [selector|sidebar|departures ...]
+
+Exits non-zero if the p95 latency of any scenario exceeds --max-latency-ms.
+"""
+
+import contextlib
+import importlib.machinery
+import importlib.util
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import fixtures
+from fake_infobeamer import FakeInfoBeamer
+from mvg_standin import MVGStandin
+
+ROUNDS = 50
+BURST = 200
+QUIET = 0.1
+STATION_IDS = [470, 1110, 1130]
+HEADLINES = [
+    'Bundestag beschließt Haushalt',
+    'Streik bei der S-Bahn München',
+    'Unwetterwarnung für Oberbayern',
+    'FC Bayern gewinnt Pokalspiel',
+    'Neue Tramlinie in Schwabing eröffnet',
+    'Oktoberfest endet mit Besucherrekord'
+]
+
+
+def _load_script(name, path):
+    loader = importlib.machinery.SourceFileLoader(name, path)
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+
+    return module
+
+
+def _write_config(base_url=''):
+    config = json.load(open(os.path.join(fixtures.ROOT_DIR, 'config.json.example')))
+    config['mvg']['base_url'] = base_url
+    config['mvg']['stations'] = STATION_IDS
+    config['coordinates'] = {'lat': '48.137', 'lng': '11.575'}
+
+    _remove_config()
+    fd, path = tempfile.mkstemp(prefix='tmp_config.', suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(config, f)
+    os.environ['INFOSCREEN_CONFIG'] = path
+
+    return path
+
+
+def _remove_config():
+    path = os.environ.pop('INFOSCREEN_CONFIG', None)
+    if path:
+        os.unlink(path)
+
+
+def _settle(server, index):
+    """Wait until the server was quiet for QUIET seconds, return the messages since `index`."""
+    count = index
+    while server.wait_for(count + 1, QUIET):
+        count += 1
+
+    return server.since(index)
+
+
+def _size(message):
+    if message.transport == 'udp':
+        return len(message.target) + 1 + len(message.payload)
+
+    return len(message.payload) + 1
+
+
+def _measure(server, name, update, rounds=ROUNDS, burst=BURST):
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    latencies = []
+    messages = []
+    for i in range(rounds):
+        index = server.count()
+        start = time.perf_counter()
+        with quiet:
+            update(i)
+        received = _settle(server, index)
+        if received:
+            latencies.append(received[-1].timestamp - start)
+        messages.extend(received)
+
+    index = server.count()
+    start = time.perf_counter()
+    with quiet:
+        for i in range(rounds, rounds + burst):
+            update(i)
+    received = _settle(server, index)
+    elapsed = (received[-1].timestamp - start) if received else 0
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else float('nan')
+    print('  {:24} msgs/update {:5.2f}  bytes/update {:7.1f}  latency p50 {:6.2f} ms  p95 {:6.2f} ms  rate {:8.0f} msg/s'.format(
+        name, len(messages) / rounds, sum(_size(m) for m in messages) / rounds,
+        statistics.median(latencies) * 1000 if latencies else float('nan'), p95,
+        len(received) / elapsed if elapsed else 0))
+
+    return p95
+
+
+def bench_selector(server):
+    print('selector/service')
+
+    selector_dir = os.path.join(fixtures.ROOT_DIR, 'selector')
+    if selector_dir not in sys.path:
+        sys.path.insert(0, selector_dir)
+    from modules import module, registry, selector, utils
+
+    for i in range(8):
+        cls = type('Bench{}'.format(i), (module.Module,), {
+            'ID': 'bench{}'.format(i),
+            'TITLE': 'Module {}'.format(i),
+            'SUBTITLE': 'Subtitle {}'.format(i),
+            'PICON_URL': None,
+            'on_visible': lambda self: None,
+            'on_exit': lambda self: None
+        })
+        cls.register()
+    menu = registry.get_selector()
+
+    def navigate(i):
+        if i % 10 == 0:
+            menu.on_visible()
+        else:
+            menu.on_down()
+
+    def episodes(i):
+        entries = []
+        for j in range(i, i + 20):
+            entries.append({
+                'title': 'Tagesschau',
+                'picon': utils.prefix_tmp('tagesschau'),
+                'subtitle': 'Folge {} - 15 min'.format(j)
+            })
+        utils.ib_update_selector(entries)
+
+    return max(_measure(server, 'navigation', navigate),
+               _measure(server, 'entry list', episodes))
+
+
+def bench_sidebar(server):
+    print('service')
+
+    _write_config()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sidebar = _load_script('sidebar_service', os.path.join(fixtures.ROOT_DIR, 'service'))
+
+    sidebar.weather_service.get = lambda: {'t_current': '12 °C', 't_low': '8°C', 't_high': '17°C', 'icon': 'cloudy'}
+    sidebar.get_sunrise_sunset = lambda: ('07:32', '18:21')
+
+    def news(i):
+        sidebar.get_news = lambda: [{
+            'title': HEADLINES[(i + j) % len(HEADLINES)],
+            'published': '{:02d}:{:02d}'.format(j, i % 60),
+            'today': True,
+            'relative': 'vor 0d'
+        } for j in range(5)]
+        sidebar.update_news()
+
+    return max(_measure(server, 'clock', lambda i: sidebar.send_clock()),
+               _measure(server, 'weather', lambda i: sidebar.update()),
+               _measure(server, 'news', news))
+
+
+def bench_departures(server):
+    print('muc-oepnv/service')
+
+    fixtures.add_mvg_path()
+    with MVGStandin() as standin:
+        _write_config(standin.base_url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            departures = _load_script('departures_service', os.path.join(fixtures.MVG_DIR, 'service'))
+
+        now = int(time.time() * 1000)
+
+        def update(i):
+            for station_id in STATION_IDS:
+                payload = fixtures.departures(station_id, now=now + (i // 2) * 60000)
+                standin.set_payload('departure', payload, station_id)
+            departures.update()
+
+        p95 = max(_measure(server, 'clock', lambda i: departures.send_clock()),
+                  _measure(server, 'board', update, burst=ROUNDS))
+        departures.async_mvgapi.close()
+
+    return p95
+
+
+BENCHMARKS = {
+    'selector': bench_selector,
+    'sidebar': bench_sidebar,
+    'departures': bench_departures
+}
+
+
+def main():
+    max_latency = None
+    names = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--max-latency-ms='):
+            max_latency = float(arg.split('=', 1)[1])
+        else:
+            names.append(arg)
+
+    server = FakeInfoBeamer().start()
+    os.environ['INFOBEAMER_PORT'] = str(server.port)
+    # keep the snapshots of the benchmark payloads out of the real cache
+    cache_dir = tempfile.mkdtemp(prefix='tmp_cache.')
+    os.environ['INFOSCREEN_CACHE'] = cache_dir
+    sys.path.insert(0, fixtures.ROOT_DIR)
+
+    failed = []
+    try:
+        for name in names or BENCHMARKS:
+            p95 = BENCHMARKS[name](server)
+            if max_latency is not None and not p95 <= max_latency:
+                failed.append(name)
+    finally:
+        _remove_config()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print('{} messages, {} node connections'.format(server.count(), server.connections))
+    if failed:
+        print('p95 latency above {} ms: {}'.format(max_latency, ', '.join(failed)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
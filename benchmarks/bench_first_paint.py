@@ -0,0 +1,174 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: time from daemon start to the first and the first fresh paint
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Starts service and muc-oepnv/service against the fake info-beamer, the MVG stand-in and
+a slow local news feed, first with an empty cache (cold) and then again with the
+snapshot the first run left behind (warm):
+
+    bench_first_paint.py [--root=DIR] [--feed-latency=S] [--mvg-latency=S]
+
+--root runs the daemons of another checkout, e.g. an older revision for comparison.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fixtures
+from fake_infobeamer import FakeInfoBeamer
+from mvg_standin import MVGStandin
+
+TIMEOUT = 30
+# the daemons save their snapshot after pushing
+LINGER = 1
+FEED_LATENCY = 1.0
+MVG_LATENCY = 0.5
+HEADLINES = [
+    'Streik bei der S-Bahn München',
+    'Unwetterwarnung für Oberbayern',
+    'Neue Tramlinie in Schwabing eröffnet'
+]
+DAEMONS = [
+    # script, node, data_mapper path drawn from local data
+    ('service', 'infoscreen', 'infoscreen/weather/sunrise'),
+    ('muc-oepnv/service', 'departures', 'departures/clock/set')
+]
+
+
+def feed_server(latency):
+    now = time.time()
+    items = ''.join('<item><guid>{0}</guid><title>{1}</title><pubDate>{2}</pubDate></item>'.format(
+        i, title, formatdate(now - i * 600, usegmt=True)) for i, title in enumerate(HEADLINES))
+    body = '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>Bench</title>{}</channel></rss>'.format(
+        items).encode('utf8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def write_config(path, mvg_url, feed_url):
+    config = json.load(open(os.path.join(fixtures.ROOT_DIR, 'config.json.example')))
+    config['mvg']['base_url'] = mvg_url
+    config['mvg']['stations'] = [470]
+    config['coordinates'] = {'lat': '48.137', 'lng': '11.575'}
+    config['weather']['providers'] = []
+    config['news']['feeds'] = [{'name': 'Bench', 'url': feed_url}]
+
+    with open(path, 'w') as f:
+        json.dump(config, f)
+
+
+def first(messages, start, match):
+    for message in messages:
+        if match(message):
+            return message.timestamp - start
+
+    return None
+
+
+def run(root, server, script, node, path, env):
+    """Start `script`, return the seconds to its first local, first and first fresh paint."""
+    def local(message):
+        return message.transport == 'udp' and message.target == path
+
+    def paint(message):
+        return message.transport == 'tcp' and message.target == node
+
+    def fresh(message):
+        return paint(message) and b'"stale": true' not in message.payload
+
+    index = server.count()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(root, script)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        while time.perf_counter() - start < TIMEOUT and first(server.since(index), start, fresh) is None:
+            server.wait_for(server.count() + 1, 0.1)
+        time.sleep(LINGER)
+    finally:
+        process.terminate()
+        process.wait()
+
+    messages = server.since(index)
+
+    return tuple(first(messages, start, match) for match in (local, paint, fresh))
+
+
+def main():
+    root = fixtures.ROOT_DIR
+    feed_latency = FEED_LATENCY
+    mvg_latency = MVG_LATENCY
+    for arg in sys.argv[1:]:
+        name, _, value = arg.partition('=')
+        if name == '--root':
+            root = os.path.abspath(value)
+        elif name == '--feed-latency':
+            feed_latency = float(value)
+        elif name == '--mvg-latency':
+            mvg_latency = float(value)
+
+    server = FakeInfoBeamer().start()
+    feeds = feed_server(feed_latency)
+    work_dir = tempfile.mkdtemp(prefix='tmp_first_paint.')
+
+    with MVGStandin(latency=mvg_latency) as standin:
+        standin.set_payload('departure', fixtures.departures(470, now=int(time.time() * 1000)), 470)
+        config_path = os.path.join(work_dir, 'config.json')
+        write_config(config_path, standin.base_url, 'http://127.0.0.1:{}/rss'.format(feeds.server_port))
+        env = dict(os.environ, INFOBEAMER_PORT=str(server.port), INFOSCREEN_CONFIG=config_path,
+                   INFOSCREEN_CACHE=os.path.join(work_dir, 'cache'))
+
+        print('{} (feed latency {} s, MVG latency {} s)'.format(root, feed_latency, mvg_latency))
+        try:
+            for start in ('cold', 'warm'):
+                for script, node, path in DAEMONS:
+                    local, paint, fresh = run(root, server, script, node, path, env)
+                    print('  {:4} {:18} local data {:>8}  first paint {:>8}  fresh data {:>8}'.format(
+                        start, script, *('{:.2f} s'.format(t) if t is not None else '-' for t in (local, paint, fresh))))
+        finally:
+            feeds.shutdown()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: benchmark memory and build time of the MVG model classes
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import timeit
+import tracemalloc
+
+import fixtures
+
+fixtures.add_mvg_path()
+import mvg_api
+
+
+class DictStation(object):
+    """The pre-__slots__ Station, kept as baseline for the comparison."""
+
+    def __init__(self, type, latitude, longitude, id, place, name, has_live_data, has_zoom_data,
+                 products, aliases, link=None):
+        self._type = type
+        self._latitude = latitude
+        self._longitude = longitude
+        self._id = id
+        self._place = place
+        self._name = name
+        self._has_live_data = has_live_data
+        self._has_zoom_data = has_zoom_data
+        self._products = products
+        self._aliases = aliases
+        self._link = link
+
+
+def build_dict(raw_stations):
+    return [DictStation(station['type'], station['latitude'], station['longitude'],
+                        station['id'], station['place'], station['name'],
+                        station['hasLiveData'], station['hasZoomData'],
+                        station['products'], station['aliases'])
+            for station in raw_stations]
+
+
+def build_slots_init(raw_stations):
+    fields = mvg_api.Station._json_fields
+    return [mvg_api.Station(*fields(station)) for station in raw_stations]
+
+
+def build_slots(raw_stations):
+    return mvg_api.Station.from_json_list(raw_stations)
+
+
+def measure(name, build, raw_stations, repeat=20, number=5):
+    tracemalloc.start()
+    objects = build(raw_stations)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+
+    best = min(timeit.repeat(lambda: build(raw_stations), number=number, repeat=repeat)) / number
+
+    print('{:8} {:8.1f} bytes/object {:8.2f} ms build {:8.2f} us/object'.format(
+        name, size / len(raw_stations), best * 1000, best * 1e6 / len(raw_stations)))
+
+
+def main():
+    raw_stations = fixtures.recorded_station_data()['stations']
+    print('stationData: {} stations'.format(len(raw_stations)))
+
+    measure('dict', build_dict, raw_stations)
+    measure('__init__', build_slots_init, raw_stations)
+    measure('slots', build_slots, raw_stations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: offline regression benchmarks for the MVG client
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Runs against the local MVG stand-in, so neither an API key nor network access is needed:
+
+    bench_mvg.py [poll|parse|alloc ...]
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+
+import fixtures
+from mvg_standin import MVGStandin
+
+fixtures.add_mvg_path()
+import departure_board
+import mvg_api
+import mvg_api_async
+
+STATION_IDS = [470, 1110, 1130, 1140, 1150]
+POLL_ROUNDS = 10
+LATENCY = 0.05
+MESSAGES_LATENCY = 0.15
+
+
+def _sequential_poll(api, station_ids):
+    for station_id in station_ids:
+        api.get_departures_list(station_id)
+    api.get_messages_data()
+
+
+def _concurrent_poll(async_api, board):
+    async def poll():
+        return await asyncio.gather(board.fetch(), async_api.get_messages_data())
+
+    return asyncio.run(poll())
+
+
+def bench_poll():
+    print('end-to-end poll latency ({:.0f} ms per request, {:.0f} ms for messages)'.format(
+        LATENCY * 1000, MESSAGES_LATENCY * 1000))
+
+    with MVGStandin(latency=LATENCY) as standin:
+        standin.endpoint_latency['messages'] = MESSAGES_LATENCY
+
+        for count in (1, 3, len(STATION_IDS)):
+            station_ids = STATION_IDS[:count]
+            api = mvg_api.MVGAPI(base_url=standin.base_url, pool_size=count + 1)
+            async_api = mvg_api_async.AsyncMVGAPI(api, concurrency=count + 1)
+            board = departure_board.DepartureBoard(async_api, station_ids)
+
+            for name, poll in (('sequential', lambda: _sequential_poll(api, station_ids)),
+                               ('concurrent', lambda: _concurrent_poll(async_api, board))):
+                poll()
+                samples = []
+                for _ in range(POLL_ROUNDS):
+                    start = time.perf_counter()
+                    poll()
+                    samples.append(time.perf_counter() - start)
+
+                print('  {} stations {:10} median {:7.1f} ms  max {:7.1f} ms'.format(
+                    count, name, statistics.median(samples) * 1000, max(samples) * 1000))
+
+            stats = api.connection_stats()
+            print('  {} stations connections {connections} for {requests} requests'.format(count, **stats))
+            async_api.close()
+
+
+def _parse_departures(data):
+    return [mvg_api.Departure.from_json(departure) for departure in data['departures']]
+
+
+def _parse_messages(data):
+    return [mvg_api.Message.from_json(message, mvg_api.Line.from_json_list(message.get('lines', ())))
+            for message in data['messages']]
+
+
+def _parse_stations(data):
+    return mvg_api.Station.from_json_list(data['stations'])
+
+
+PAYLOADS = [
+    ('departure', _parse_departures, lambda size: fixtures.departures(470, size), (10, 40, 160)),
+    ('messages', _parse_messages, lambda size: fixtures.messages(size), (10, 30, 120)),
+    ('stationData', _parse_stations, lambda size: fixtures.station_data(size), (1000, 4500, 20000)),
+]
+
+
+def bench_parse():
+    print('parse time per payload size')
+
+    for name, parse, generate, sizes in PAYLOADS:
+        for size in sizes:
+            data = generate(size)
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+            decode = min(timeit.repeat(lambda: json.loads(body), number=5, repeat=5)) / 5
+            build = min(timeit.repeat(lambda: parse(data), number=5, repeat=5)) / 5
+
+            print('  {:12} {:6} items {:8.1f} KiB  decode {:7.2f} ms  build {:7.2f} ms  {:6.2f} us/item'.format(
+                name, size, len(body) / 1024, decode * 1000, build * 1000, (decode + build) * 1e6 / size))
+
+
+def bench_alloc():
+    print('allocations per poll')
+
+    with MVGStandin() as standin:
+        api = mvg_api.MVGAPI(base_url=standin.base_url)
+        async_api = mvg_api_async.AsyncMVGAPI(api)
+        board = departure_board.DepartureBoard(async_api, STATION_IDS[:3])
+
+        for name, poll in (('departures', lambda: api.get_departures(470)),
+                           ('messages', lambda: api.get_messages()),
+                           ('stationData', lambda: api.get_stations()),
+                           ('board', lambda: _concurrent_poll(async_api, board))):
+            poll()
+
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            poll()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+            print('  {:12} peak {:8.1f} KiB  retained blocks {:6}'.format(name, peak / 1024, blocks))
+
+        async_api.close()
+
+
+BENCHMARKS = {
+    'poll': bench_poll,
+    'parse': bench_parse,
+    'alloc': bench_alloc
+}
+
+
+def main():
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
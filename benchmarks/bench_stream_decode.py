@@ -0,0 +1,121 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: benchmark peak RSS of list vs. streaming decoding of stationData
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+    bench_stream_decode.py [stations]    peak RSS of the decoding modes
+    bench_stream_decode.py check         split test payloads at every byte offset
+"""
+
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import fixtures
+from mvg_standin import MVGStandin
+
+MODES = ['list', 'iter-retain', 'iter']
+
+# documents with numbers, escapes and multi-byte characters that can be cut anywhere
+CHECK_PAYLOADS = [
+    ('[3.25, -0.5, 1e3, 2E-2, 12345678901234567890, 0, -7]', None),
+    ('[true, false, null, "", "a\\"b", "\\u00fc", "München", [], {}]', None),
+    ('{"v": 1e3, "stations": [{"id": 470, "lat": 48.1374, "name": "Marienplatz"}], "n": -2.5e-1}', 'stations'),
+    ('{"stations": [1.5, 22, 333.25], "hash": "abc", "version": 17}', 'stations'),
+    ('  {  "a" : [ ] , "b" : 0.125 }  ', 'a')
+]
+
+
+def max_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def client(mode, base_url):
+    # every mode runs in a fresh interpreter with identical imports, so the
+    # absolute peak RSS of the processes is comparable
+    fixtures.add_mvg_path()
+    import mvg_api
+
+    api = mvg_api.MVGAPI(base_url=base_url)
+    start = time.perf_counter()
+
+    if mode == 'list':
+        count = len(api.get_stations().stations)
+    elif mode == 'iter-retain':
+        count = len(list(api.iter_stations()))
+    else:
+        count = sum(1 for station in api.iter_stations())
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'mode': mode, 'stations': count, 'peak_kb': max_rss_kb(), 'seconds': elapsed}))
+
+
+def check():
+    fixtures.add_mvg_path()
+    import json_stream
+
+    failed = 0
+    cases = 0
+    for text, key in CHECK_PAYLOADS:
+        payload = text.encode('utf-8')
+        document = json.loads(text)
+        expected = (document if key is None else document[key],
+                    {} if key is None else {name: value for name, value in document.items() if name != key})
+
+        splits = [[payload[:i], payload[i:]] for i in range(len(payload) + 1)]
+        splits.append([payload[i:i + 1] for i in range(len(payload))])
+        for chunks in splits:
+            cases += 1
+            meta = {}
+            try:
+                result = (list(json_stream.iter_array(chunks, key, meta)), meta)
+            except ValueError as e:
+                result = e
+            if result != expected:
+                failed += 1
+                print('{!r}: got {!r}'.format(chunks, result))
+
+    print('{} of {} split payloads decoded wrongly'.format(failed, cases))
+    sys.exit(1 if failed else 0)
+
+
+def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    data = fixtures.station_data(stations) if stations else fixtures.recorded_station_data()
+    payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    print('stationData: {} stations, {:.1f} KiB'.format(len(data['stations']), len(payload) / 1024))
+
+    with MVGStandin(payloads={'stationData.json': data}) as standin:
+        del data
+
+        for mode in MODES:
+            output = subprocess.check_output([sys.executable, __file__, '--client', mode, standin.base_url])
+            result = json.loads(output)
+            print('{:12} peak RSS {:7.1f} MiB  {:7.1f} ms'.format(
+                result['mode'], result['peak_kb'] / 1024, result['seconds'] * 1000))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--client':
+        client(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'check':
+        check()
+    else:
+        main()
@@ -0,0 +1,146 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: parse time and peak memory of the wetter24 scraper
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Parses benchmarks/fixtures/wetter24.html (or a synthesized page of the same layout):
+
+    bench_wetter24.py               compare the full-tree baseline with the pull parser
+    bench_wetter24.py record        save the live forecast page as fixture
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import timeit
+
+import fixtures
+
+sys.path.insert(0, fixtures.ROOT_DIR)
+import weather
+
+MODES = ['tree', 'pull']
+ROUNDS = 20
+
+
+def parse_tree(html):
+    """The scraper before the pull parser, kept as baseline for the comparison."""
+    import lxml.html
+
+    root = lxml.html.fromstring(html.decode('utf-8').encode('utf-8'))
+
+    return {
+        't_current': root.xpath('//li[@class="temp"]//span[@class="temp_val"]/text()')[0],
+        't_low': root.xpath('//td[starts-with(@class,"tempvn")]/text()')[0],
+        't_high': root.xpath('//td[starts-with(@class,"tempvx")]/text()')[0],
+        'icon': weather.WETTER24_MAPPING.get(root.xpath('//img[@width="72" and @alt="symbol"]/@title')[0], 'sunny')
+    }
+
+
+def parse_pull(html, consumed=None):
+    def chunks():
+        for offset in range(0, len(html), weather.WETTER24_CHUNK_SIZE):
+            if consumed is not None:
+                consumed.append(offset)
+            yield html[offset:offset + weather.WETTER24_CHUNK_SIZE]
+
+    return weather.parse_wetter24(chunks())
+
+
+def peak_rss_kb():
+    # VmHWM starts afresh with every exec, unlike ru_maxrss, which a child process
+    # inherits from the forked parent
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+PARSERS = {
+    'tree': parse_tree,
+    'pull': parse_pull
+}
+
+
+def client(mode):
+    # every mode runs in a fresh interpreter with identical imports and the peak is
+    # reset after loading the fixture, so only the growth while parsing is counted
+    html = fixtures.wetter24_html()
+    reset_peak_rss()
+    base_kb = peak_rss_kb()
+    start = time.perf_counter()
+    result = PARSERS[mode](html)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': mode,
+        'result': result,
+        'seconds': elapsed,
+        'base_kb': base_kb,
+        'peak_kb': peak_rss_kb()
+    }))
+
+
+def record():
+    import requests
+
+    res = requests.get(weather.WETTER24_URL, timeout=weather.DEFAULT_TIMEOUT)
+    res.raise_for_status()
+    with open(os.path.join(fixtures.FIXTURES_DIR, 'wetter24.html'), 'wb') as f:
+        f.write(res.content)
+    print('recorded {:.1f} KiB'.format(len(res.content) / 1024))
+
+
+def main():
+    html = fixtures.wetter24_html()
+    consumed = []
+    parse_pull(html, consumed)
+    print('wetter24.html: {:.1f} KiB, pull parser stopped after {:.1f} KiB'.format(
+        len(html) / 1024, min(len(consumed) * weather.WETTER24_CHUNK_SIZE, len(html)) / 1024))
+
+    for mode in MODES:
+        seconds = min(timeit.repeat(lambda: PARSERS[mode](html), number=1, repeat=ROUNDS))
+        output = subprocess.check_output([sys.executable, __file__, '--client', mode])
+        result = json.loads(output)
+        print('{:6} parse {:7.2f} ms  peak RSS {:7.1f} MiB (+{:6.0f} KiB while parsing)  {}'.format(
+            mode, seconds * 1000, result['peak_kb'] / 1024, result['peak_kb'] - result['base_kb'], result['result']))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--client':
+        client(sys.argv[2])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'record':
+        record()
+    else:
+        main()
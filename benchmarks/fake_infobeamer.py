@@ -0,0 +1,135 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: fake info-beamer node server recording every message
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Usage:
+    fake_infobeamer.py [port]
+
+Run the daemons with INFOBEAMER_PORT=<port> to point them at it.
+"""
+
+import socket
+import sys
+import threading
+import time
+from collections import namedtuple
+
+DEFAULT_PORT = 4444
+GREETING = b'Info Beamer PI 1.0 (fake). Select your channel!\n'
+
+Message = namedtuple('Message', ['timestamp', 'transport', 'target', 'payload'])
+
+
+class FakeInfoBeamer:
+    """Speak info-beamer's UDP `path:value` and TCP `node\\n` channel protocol.
+
+    Every datagram and every line received on a node channel is stored as a Message
+    with a time.perf_counter() timestamp. `target` is the data_mapper path for UDP and
+    the node name for TCP; `payload` holds the raw bytes.
+    """
+
+    def __init__(self, port=0, echo=False):
+        self.echo = echo
+        self.messages = []
+        self.connections = 0
+
+        self._cond = threading.Condition()
+        self._tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._tcp.bind(('127.0.0.1', port))
+        self._tcp.listen(16)
+        self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp.bind(('127.0.0.1', self._tcp.getsockname()[1]))
+
+    @property
+    def port(self):
+        return self._tcp.getsockname()[1]
+
+    def _record(self, transport, target, payload):
+        message = Message(time.perf_counter(), transport, target, payload)
+        with self._cond:
+            self.messages.append(message)
+            self._cond.notify_all()
+
+        if self.echo:
+            print('{} {} {}'.format(transport, target, payload[:200].decode('utf8', 'replace')))
+
+    def _serve_udp(self):
+        while True:
+            data, _ = self._udp.recvfrom(65536)
+            path, _, value = data.partition(b':')
+            self._record('udp', path.decode('utf8', 'replace'), value)
+
+    def _serve_client(self, conn):
+        with conn:
+            conn.sendall(GREETING)
+            reader = conn.makefile('rb')
+            node = reader.readline().strip().decode('utf8', 'replace')
+            conn.sendall(b'ok!\n')
+
+            for line in reader:
+                self._record('tcp', node, line.rstrip(b'\n'))
+
+    def _serve_tcp(self):
+        while True:
+            conn, _ = self._tcp.accept()
+            self.connections += 1
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def start(self):
+        threading.Thread(target=self._serve_udp, daemon=True).start()
+        threading.Thread(target=self._serve_tcp, daemon=True).start()
+
+        return self
+
+    def count(self):
+        with self._cond:
+            return len(self.messages)
+
+    def wait_for(self, count, timeout=5):
+        """Wait until at least `count` messages were received, return the last one."""
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while len(self.messages) < count:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+            return self.messages[count - 1]
+
+    def since(self, index):
+        with self._cond:
+            return self.messages[index:]
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    FakeInfoBeamer(port, echo=True).start()
+    print('fake info-beamer listening on 127.0.0.1:{}'.format(port))
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
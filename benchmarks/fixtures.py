@@ -0,0 +1,228 @@
+"""
+infoscreen: fixtures for the offline benchmarks
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import random
+import sys
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures')
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+MVG_DIR = os.path.join(ROOT_DIR, 'muc-oepnv')
+
+PRODUCTS = ['UBAHN', 'SBAHN', 'TRAM', 'BUS', 'REGIONAL_BUS', 'ZUG']
+PLACES = ['München', 'Garching', 'Unterschleißheim', 'Ottobrunn', 'Planegg', 'Haar']
+
+
+def add_mvg_path():
+    if MVG_DIR not in sys.path:
+        sys.path.insert(0, MVG_DIR)
+
+
+def load(name):
+    """Load a recorded payload from benchmarks/fixtures, or None if it was not recorded."""
+    path = os.path.join(FIXTURES_DIR, name)
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def station_data(count=4500, seed=470):
+    """Synthesize a dynamicdata/stationData payload shaped like the recorded one."""
+    rnd = random.Random(seed)
+
+    stations = []
+    for i in range(count):
+        stations.append({
+            'type': 'station',
+            'latitude': round(48.0 + rnd.random() * 0.3, 6),
+            'longitude': round(11.4 + rnd.random() * 0.4, 6),
+            'id': 'de:09162:{}'.format(i + 1),
+            'place': rnd.choice(PLACES),
+            'name': 'Haltestelle {}'.format(i + 1),
+            'hasLiveData': rnd.random() < 0.8,
+            'hasZoomData': rnd.random() < 0.1,
+            'products': rnd.sample(PRODUCTS, rnd.randint(1, 3)),
+            'aliases': 'Hst{} Halt {}'.format(i + 1, i + 1)
+        })
+
+    return {
+        'hash': '{:032x}'.format(rnd.getrandbits(128)),
+        'version': 1,
+        'stations': stations
+    }
+
+
+def recorded_station_data():
+    return load('stationData.json') or station_data()
+
+
+LINES = [('U1', 'UBAHN'), ('U2', 'UBAHN'), ('U3', 'UBAHN'), ('U6', 'UBAHN'), ('S1', 'SBAHN'), ('S8', 'SBAHN'),
+         ('17', 'TRAM'), ('27', 'TRAM'), ('54', 'BUS'), ('100', 'BUS'), ('X30', 'BUS'), ('210', 'REGIONAL_BUS')]
+DESTINATIONS = ['Klinikum Großhadern', 'Garching-Forschungszentrum', 'Fürstenried West', 'Moosach',
+                'Flughafen München', 'Amalienburgstraße', 'Ostbahnhof', 'Münchner Freiheit']
+
+
+def departures(station_id=470, count=40, now=None, seed=None):
+    """Synthesize a departure/<station> payload, sorted by departure time."""
+    rnd = random.Random(station_id if seed is None else seed)
+    if now is None:
+        now = 1540000000000
+
+    result = []
+    departure_time = now
+    for i in range(count):
+        departure_time += rnd.randint(0, 180) * 1000
+        label, product = rnd.choice(LINES)
+        result.append({
+            'departureTime': departure_time,
+            'product': product,
+            'label': label,
+            'destination': rnd.choice(DESTINATIONS),
+            'live': rnd.random() < 0.9,
+            'lineBackgroundColor': '#{:06x}'.format(rnd.getrandbits(24)),
+            'departureId': '{}-{}'.format(station_id, i),
+            'sev': False
+        })
+
+    return {
+        'servingLines': [],
+        'departures': result
+    }
+
+
+def messages(count=30, now=None, seed=6):
+    """Synthesize a messages payload."""
+    rnd = random.Random(seed)
+    if now is None:
+        now = 1540000000000
+
+    result = []
+    for i in range(count):
+        lines = []
+        for label, product in rnd.sample(LINES, rnd.randint(1, 3)):
+            lines.append({
+                'divaId': '{:05d}'.format(rnd.randint(1, 99999)),
+                'lineNumber': label,
+                'product': product,
+                'sev': False,
+                'destination': rnd.choice(DESTINATIONS)
+            })
+
+        message = {
+            'id': 1000 + i,
+            'type': rnd.choice(['INCIDENT', 'SCHEDULE_CHANGE']),
+            'lines': lines,
+            'title': 'Störung {}'.format(i),
+            'description': 'Beschreibung der Störung {} '.format(i) * 10,
+            'publication': now - 3600000,
+            'validFrom': now - 3600000
+        }
+        if rnd.random() < 0.5:
+            message['validTo'] = now + 3600000
+        result.append(message)
+
+    return {
+        'status': 'OK',
+        'messages': result
+    }
+
+
+def lines(count=400, seed=3):
+    """Synthesize a dynamicdata/lines payload."""
+    rnd = random.Random(seed)
+
+    result = []
+    for i in range(count):
+        label, product = LINES[i % len(LINES)]
+        line = {
+            'divaId': '{:05d}'.format(i),
+            'lineNumber': label if i < len(LINES) else '{}{}'.format(label, i),
+            'product': product,
+            'sev': rnd.random() < 0.05
+        }
+        if rnd.random() < 0.3:
+            line['partialNet'] = 'mvv'
+        result.append(line)
+
+    return result
+
+
+def zoom(station_id=470, count=12, seed=None):
+    """Synthesize a zoom/<station> payload."""
+    rnd = random.Random(station_id if seed is None else seed)
+
+    devices = []
+    for i in range(count):
+        device = {
+            'status': rnd.choice(['OPERATIVE', 'OUT_OF_SERVICE']),
+            'name': 'Aufzug {}'.format(i),
+            'identifier': '{}-{}'.format(station_id, i),
+            'xcoordinate': rnd.randint(0, 1000),
+            'ycoordinate': rnd.randint(0, 1000),
+            'description': 'Zwischengeschoss - Bahnsteig',
+            'type': rnd.choice(['ELEVATOR', 'ESCALATOR'])
+        }
+        if rnd.random() < 0.5:
+            device['lastUpdate'] = 1540000000000
+        if device['status'] == 'OUT_OF_SERVICE':
+            device['planned'] = {'since': 1540000000000, 'until': 1540100000000, 'description': 'Wartung'}
+        devices.append(device)
+
+    return {
+        'efaId': station_id,
+        'name': 'Haltestelle {}'.format(station_id),
+        'transportDevices': devices
+    }
+
+
+def wetter24_html(days=14, seed=24):
+    """Return the recorded wetter24 forecast page, or synthesize one of similar size and layout."""
+    path = os.path.join(FIXTURES_DIR, 'wetter24.html')
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    rnd = random.Random(seed)
+    symbols = ['sonnig', 'heiter', 'wolkig', 'bedeckt', 'stark bewölkt, Regenschauer', 'bedeckt, leichter Regen']
+
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>Wetter München</title>']
+    for i in range(40):
+        parts.append('<script>var config{} = {};</script>'.format(i, '{"a": 1, "b": [1, 2, 3]}, ' * 60))
+        parts.append('<style>.c{0} {{ margin: {0}px; padding: {0}px; }}</style>'.format(i))
+    parts.append('</head><body><nav><ul>')
+    for i in range(200):
+        parts.append('<li class="nav"><a href="/wetter/{0}">Ort {0}</a></li>'.format(i))
+    parts.append('</ul></nav><div id="forecast"><ul><li class="temp"><span class="temp_val">{}°C</span></li></ul>'.format(
+        rnd.randint(-5, 30)))
+    parts.append('<img width="72" height="72" alt="symbol" title="{}" src="/symbol.png">'.format(rnd.choice(symbols)))
+    parts.append('<table>')
+    for day in range(days):
+        low = rnd.randint(-10, 15)
+        parts.append('<tr><td class="day">Tag {}</td><td class="tempvn">{}°C</td><td class="tempvx">{}°C</td>'
+                     '<td><img width="36" alt="symbol" title="{}"></td></tr>'.format(day, low, low + rnd.randint(2, 12), rnd.choice(symbols)))
+    parts.append('</table></div>')
+    for i in range(300):
+        parts.append('<div class="article"><h3>Artikel {0}</h3><p>{1}</p><img src="/img/{0}.jpg" width="300"></div>'.format(
+            i, 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 8))
+    parts.append('<footer>wetter24</footer></body></html>')
+
+    return ''.join(parts).encode('utf-8')
@@ -0,0 +1,249 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: local stand-in for the MVG API replaying recorded responses
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Usage:
+    mvg_standin.py serve [port] [latency seconds] [error rate]
+    mvg_standin.py record <api key> [station id ...]
+
+Point muc-oepnv/service at it with "base_url": "http://127.0.0.1:<port>/" in the
+mvg section of config.json.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import fixtures
+
+DEFAULT_PORT = 8470
+DEFAULT_STATIONS = [470]
+
+
+def _station_key(station_id):
+    return str(station_id).rsplit(':', 1)[-1]
+
+
+def _fixture_name(endpoint, argument=None):
+    if endpoint == 'departure':
+        return 'departure_{}.json'.format(_station_key(argument))
+    if endpoint == 'zoom':
+        return 'zoom_{}.json'.format(_station_key(argument))
+    if endpoint == 'dynamicdata/stationData':
+        return 'stationData.json'
+    if endpoint == 'dynamicdata/lines':
+        return 'lines.json'
+
+    return '{}.json'.format(endpoint)
+
+
+def _synthesize(endpoint, argument=None):
+    if endpoint == 'departure':
+        station_id = int(_station_key(argument)) if _station_key(argument).isdigit() else 470
+        return fixtures.departures(station_id, now=int(time.time() * 1000))
+    if endpoint == 'zoom':
+        station_id = int(_station_key(argument)) if _station_key(argument).isdigit() else 470
+        return fixtures.zoom(station_id)
+    if endpoint == 'dynamicdata/stationData':
+        return fixtures.station_data()
+    if endpoint == 'dynamicdata/lines':
+        return fixtures.lines()
+    if endpoint == 'messages':
+        return fixtures.messages(now=int(time.time() * 1000))
+
+    return None
+
+
+class MVGStandin(object):
+    """Serve recorded MVG responses from benchmarks/fixtures over HTTP.
+
+    Endpoints without a recording are answered with synthesized payloads of the same
+    shape. `latency` and `error_rate` apply to every request and can be overridden per
+    endpoint ('departure', 'messages', 'zoom', 'dynamicdata/stationData', ...).
+    """
+
+    def __init__(self, port=0, latency=0, error_rate=0, error_status=503, payloads=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.endpoint_latency = {}
+        self.endpoint_error_rate = {}
+        self.requests = {}
+        self.errors = 0
+
+        self._payloads = dict(payloads or {})
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(4444)
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_port
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{}/'.format(self.port)
+
+    def set_payload(self, endpoint, data, argument=None):
+        name = _fixture_name(endpoint, argument)
+        with self._lock:
+            self._payloads[name] = data
+            self._cache.pop(name, None)
+
+    def _body(self, endpoint, argument):
+        name = _fixture_name(endpoint, argument)
+
+        with self._lock:
+            body = self._cache.get(name)
+            if body is not None:
+                return body
+
+            data = self._payloads.get(name)
+            if data is None:
+                data = fixtures.load(name)
+            if data is None:
+                data = _synthesize(endpoint, argument)
+            if data is None:
+                return None
+
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self._cache[name] = body
+
+            return body
+
+    @staticmethod
+    def _route(path):
+        path = urlsplit(path).path.strip('/')
+        for endpoint in ('departure', 'zoom'):
+            if path.startswith(endpoint + '/'):
+                return endpoint, path[len(endpoint) + 1:]
+
+        return path, None
+
+    def _respond(self, handler):
+        endpoint, argument = self._route(handler.path)
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            failed = self._random.random() < self.endpoint_error_rate.get(endpoint, self.error_rate)
+            if failed:
+                self.errors += 1
+
+        latency = self.endpoint_latency.get(endpoint, self.latency)
+        if latency:
+            time.sleep(latency)
+
+        body = None if failed else self._body(endpoint, argument)
+        if body is None:
+            status = self.error_status if failed else 404
+            handler.send_response(status)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json;charset=UTF-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                standin._respond(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def record(api_key, station_ids):
+    """Store live responses of the MVG API as fixtures for the stand-in."""
+    fixtures.add_mvg_path()
+    import mvg_api
+
+    api = mvg_api.MVGAPI(api_key=api_key)
+    requests = [('dynamicdata/stationData', None, lambda: api._get_stations()),
+                ('dynamicdata/lines', None, api._get_lines),
+                ('messages', None, api._get_messages)]
+    for station_id in station_ids:
+        requests.append(('departure', station_id, lambda station_id=station_id: api._get_departures(station_id)))
+        requests.append(('zoom', station_id, lambda station_id=station_id: api._get_zoom_data(station_id)))
+
+    os.makedirs(fixtures.FIXTURES_DIR, exist_ok=True)
+    for endpoint, argument, request in requests:
+        name = _fixture_name(endpoint, argument)
+        try:
+            data = request().json()
+        except Exception as e:
+            print('{}: {!r}'.format(name, e))
+            continue
+
+        with open(os.path.join(fixtures.FIXTURES_DIR, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        print('{}: recorded'.format(name))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == 'record':
+        record(sys.argv[2], sys.argv[3:] or DEFAULT_STATIONS)
+        return
+
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+    error_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    standin = MVGStandin(port, latency, error_rate)
+    print('MVG stand-in listening on {}'.format(standin.base_url))
+    try:
+        standin._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""
+infoscreen: client library for the info-beamer UDP and TCP interfaces
+
+Every daemon talks to info-beamer through this package: `notify()` for data_mapper
+paths over UDP, `send()` for JSON lines to a node's input event over TCP and
+`update_entries()` for delta-encoded entry lists. Images shown by the nodes are
+downloaded through `fetch_asset()`, and `Snapshot` keeps the last pushed payloads
+for a warm start.
+"""
+
+from .assets import ARTWORK_SIZE, PICON_SIZE, AssetCache, fetch_asset, get_asset_cache
+from .channel import NodeChannel, all_channels, flush_all, get_channel
+from .config import IB_HOST, IB_PORT
+from .entries import EntrySync, diff_entries, get_entry_sync, update_entries
+from .notifier import Notifier, get_notifier, notify
+from .snapshot import Snapshot
+
+
+def send(node, line):
+    get_channel(node).send(line)
+
+
+def stats():
+    return {
+        'notify': get_notifier().stats(),
+        'channels': {channel.node: channel.stats() for channel in all_channels()}
+    }
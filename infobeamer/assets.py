@@ -0,0 +1,297 @@
+"""
+infoscreen: content-addressed cache for picons and artwork
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CACHE_DIR = os.environ.get('INFOSCREEN_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'infoscreen'))
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TIMEOUT = (5, 30)
+IMAGE_EXTENSIONS = ('jpeg', 'jpg', 'png', 'gif', 'bmp')
+SCALED_FORMAT = 'PNG'
+
+# the boxes node.lua and selector/node.lua draw into, with selector/ scaled up by
+# about 1.5 when it is rendered as a child of the root node
+ARTWORK_SIZE = (500, 180)
+PICON_SIZE = (196, 76)
+
+
+class AssetCache:
+    """Download images once and link them into node directories as `<name>.<ext>`.
+
+    Blobs are stored under `path` by the SHA-256 of their content, so the same artwork
+    behind several URLs is kept once. `index.json` records per URL the blob, its ETag
+    and Last-Modified header and when it was last checked: within `ttl` a fetch makes no
+    network request at all, after that it is revalidated with a conditional GET. When
+    the blobs exceed `max_bytes` the least recently used ones are evicted, except those
+    linked into a node directory, which info-beamer may be showing. Images can be
+    shrunk to the size the nodes draw them at, so info-beamer never uploads a full-size
+    texture. The index is guarded by a file lock, so daemons pointed at the same `path`
+    can share one cache even when they run as different users.
+    """
+
+    def __init__(self, path=CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, session=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.downloaded = 0
+        self.failures = 0
+        self.scaled = 0
+        self.evicted = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _index(self):
+        with self._lock, open(os.path.join(self.path, 'index.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            index_path = os.path.join(self.path, 'index.json')
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {'urls': {}, 'blobs': {}, 'links': {}}
+
+            yield index
+
+            tmp_path = index_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+
+    def _blob_path(self, sha):
+        return os.path.join(self.path, sha)
+
+    def _link(self, index, sha, directory, name, ext):
+        path = os.path.join(directory, '{}.{}'.format(name, ext))
+
+        for old in glob.glob(os.path.join(glob.escape(directory), glob.escape(name) + '.*')):
+            if old != path and old.rsplit('.', 1)[-1] in IMAGE_EXTENSIONS:
+                os.remove(old)
+                index['links'].pop(old, None)
+
+        if index['links'].get(path) != sha or not os.path.isfile(path):
+            tmp_path = os.path.join(directory, '.{}.{}'.format(name, ext))
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            try:
+                os.link(self._blob_path(sha), tmp_path)
+            except OSError:
+                shutil.copyfile(self._blob_path(sha), tmp_path)
+            os.replace(tmp_path, path)
+            index['links'][path] = sha
+
+        index['blobs'][sha]['used'] = time.time()
+
+        return os.path.basename(path)
+
+    def _evict(self, index, keep=()):
+        linked = {sha for path, sha in index['links'].items() if os.path.isfile(path)}
+        total = sum(blob['size'] for blob in index['blobs'].values())
+
+        for sha, blob in sorted(index['blobs'].items(), key=lambda item: item[1]['used']):
+            if total <= self.max_bytes:
+                break
+            if sha in keep or sha in linked:
+                continue
+
+            total -= blob['size']
+            del index['blobs'][sha]
+            with contextlib.suppress(OSError):
+                os.remove(self._blob_path(sha))
+            # only links whose file is already gone are left for this blob
+            for path in [path for path, linked_sha in index['links'].items() if linked_sha == sha]:
+                del index['links'][path]
+            for url in [url for url, entry in index['urls'].items() if entry['sha'] == sha]:
+                del index['urls'][url]
+            self.evicted += 1
+
+    def _store(self, response):
+        digest = hashlib.sha256()
+        tmp_path = os.path.join(self.path, '.download.{}.{}'.format(os.getpid(), threading.get_ident()))
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(64 * 1024):
+                    digest.update(chunk)
+                    f.write(chunk)
+            size = os.path.getsize(tmp_path)
+            sha = digest.hexdigest()
+            os.replace(tmp_path, self._blob_path(sha))
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+        return sha, size
+
+    def _scale(self, sha, size):
+        key = hashlib.sha256('{}@{}x{}.{}'.format(sha, size[0], size[1], SCALED_FORMAT).encode()).hexdigest()
+        path = self._blob_path(key)
+
+        if not os.path.isfile(path):
+            tmp_path = os.path.join(self.path, '.scale.{}.{}'.format(os.getpid(), threading.get_ident()))
+            try:
+                with Image.open(self._blob_path(sha)) as image:
+                    image.thumbnail(size, Image.LANCZOS)
+                    alpha = 'A' in image.getbands() or 'transparency' in image.info
+                    image.convert('RGBA' if alpha else 'RGB').save(tmp_path, SCALED_FORMAT)
+                os.replace(tmp_path, path)
+                self.scaled += 1
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                print('scaling {} failed: {!r}'.format(sha, e))
+                return None
+            finally:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+
+        return key, os.path.getsize(path)
+
+    def fetch(self, url, directory, name, ext=None, size=None):
+        """Link the image at `url` into `directory` as `<name>.<ext>`, return the file name.
+
+        `ext` defaults to the subtype of the response's content type. If `size` is given
+        and Pillow is installed, the image is shrunk to fit into `size` and linked as
+        SCALED_FORMAT instead. Returns None if the image could not be downloaded and no
+        earlier copy is cached.
+        """
+        with self._index() as index:
+            entry = index['urls'].get(url)
+            if not entry or entry['sha'] not in index['blobs'] or not os.path.isfile(self._blob_path(entry['sha'])):
+                entry = None
+        fresh = entry and time.time() - entry['checked'] < self.ttl
+        blobs = {}
+
+        if fresh:
+            self.hits += 1
+        else:
+            headers = {}
+            if entry and entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry and entry.get('modified'):
+                headers['If-Modified-Since'] = entry['modified']
+
+            try:
+                with self.session.get(url, headers=headers, stream=True, timeout=DEFAULT_TIMEOUT) as res:
+                    if res.status_code == 304 and entry:
+                        entry = dict(entry, checked=time.time())
+                        self.revalidated += 1
+                    elif res.ok:
+                        sha, nbytes = self._store(res)
+                        blobs[sha] = nbytes
+                        entry = {
+                            'sha': sha,
+                            'etag': res.headers.get('ETag'),
+                            'modified': res.headers.get('Last-Modified'),
+                            'type': res.headers.get('Content-Type', 'image/jpeg').split(';')[0].split('/')[-1],
+                            'checked': time.time()
+                        }
+                        self.downloaded += 1
+                    else:
+                        raise requests.HTTPError('{} for {}'.format(res.status_code, url))
+            except (requests.RequestException, OSError) as e:
+                self.failures += 1
+                print('fetching {} failed: {!r}'.format(url, e))
+                if not entry:
+                    return None
+
+        link, ext = entry['sha'], ext or entry['type']
+        scaled = self._scale(entry['sha'], size) if size and Image else None
+        if scaled:
+            link, ext = scaled[0], SCALED_FORMAT.lower()
+            blobs[link] = scaled[1]
+
+        with self._index() as index:
+            for sha, nbytes in blobs.items():
+                index['blobs'][sha] = {'size': nbytes, 'used': time.time()}
+            if link not in index['blobs'] or not os.path.isfile(self._blob_path(link)):
+                return None
+            index['urls'][url] = entry
+            if entry['sha'] in index['blobs']:
+                index['blobs'][entry['sha']]['used'] = time.time()
+
+            filename = self._link(index, link, directory, name, ext)
+            self._evict(index, {entry['sha'], link})
+
+        return filename
+
+    def release(self, directory, name):
+        """Remove the files linked as `<name>.*` from `directory`; their blobs stay cached."""
+        with self._index() as index:
+            for path in glob.glob(os.path.join(glob.escape(directory), glob.escape(name) + '.*')):
+                if path.rsplit('.', 1)[-1] in IMAGE_EXTENSIONS:
+                    with contextlib.suppress(OSError):
+                        os.remove(path)
+                    index['links'].pop(path, None)
+
+    def cleanup(self, directory, prefix='tmp_'):
+        """Remove `prefix*` images in `directory` the cache does not know about."""
+        with self._index() as index:
+            for path in glob.glob(os.path.join(glob.escape(directory), glob.escape(prefix) + '*')):
+                if path.rsplit('.', 1)[-1] in IMAGE_EXTENSIONS and path not in index['links']:
+                    with contextlib.suppress(OSError):
+                        os.remove(path)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'downloaded': self.downloaded,
+            'failures': self.failures,
+            'scaled': self.scaled,
+            'evicted': self.evicted
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_asset_cache():
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = AssetCache()
+
+        return _cache
+
+
+def fetch_asset(url, directory, name, ext=None, size=None):
+    return get_asset_cache().fetch(url, directory, name, ext, size)
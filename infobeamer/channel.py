@@ -0,0 +1,201 @@
+"""
+infoscreen: persistent TCP channels to info-beamer nodes
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import atexit
+import queue
+import select
+import socket
+import threading
+import time
+
+from .config import IB_HOST, IB_PORT
+
+DEFAULT_QUEUE_SIZE = 8
+FLUSH_TIMEOUT = 2
+
+
+class NodeChannel:
+    """Long-lived TCP connection to one info-beamer node.
+
+    Lines are queued and written by a background thread, which connects, performs the
+    channel handshake once and reconnects after failures. Everything queued while a
+    write is in progress goes out in a single batch. The queue is bounded; when the
+    renderer falls behind the oldest pending line is dropped so callers never block.
+    """
+
+    RECONNECT_DELAY = 0.5
+    MAX_RECONNECT_DELAY = 10
+
+    def __init__(self, node, host=IB_HOST, port=IB_PORT, queue_size=DEFAULT_QUEUE_SIZE):
+        self.node = node
+        self.host = host
+        self.port = port
+        self.handshake = None
+        self.connects = 0
+        self.failures = 0
+        self.sent = 0
+        self.batches = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+
+        self._on_connect = []
+        self._queue = queue.Queue(queue_size)
+        self._sock = None
+        self._thread = threading.Thread(target=self._run, name='ib-{}'.format(node), daemon=True)
+        self._thread.start()
+
+    def on_connect(self, callback):
+        """Call `callback()` after every reconnect, e.g. to schedule a full resync."""
+        self._on_connect.append(callback)
+
+    def send(self, line):
+        if isinstance(line, str):
+            line = line.encode('utf8')
+
+        while True:
+            try:
+                self._queue.put_nowait(line)
+                return
+            except queue.Full:
+                pass
+
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait up to `timeout` seconds for the queued lines to be written."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        return not self._queue.unfinished_tasks
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=5)
+        try:
+            sock.recv(1000)
+            sock.sendall('{}\n'.format(self.node).encode())
+            self.handshake = sock.recv(1000).decode('utf8', 'replace').strip()
+        except OSError:
+            sock.close()
+            raise
+
+        sock.settimeout(None)
+        self.connects += 1
+
+        if self.connects > 1:
+            for callback in self._on_connect:
+                callback()
+
+        return sock
+
+    def _closed_by_peer(self):
+        readable, _, _ = select.select([self._sock], [], [], 0)
+        if not readable:
+            return False
+
+        try:
+            return self._sock.recv(1000) == b''
+        except OSError:
+            return True
+
+    def _disconnect(self):
+        if self._sock:
+            self._sock.close()
+        self._sock = None
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        delay = self.RECONNECT_DELAY
+        batch = None
+
+        while True:
+            if batch is None:
+                batch = self._next_batch()
+
+            data = b''.join(line + b'\n' for line in batch)
+            try:
+                if self._sock and self._closed_by_peer():
+                    self._disconnect()
+                if not self._sock:
+                    self._sock = self._connect()
+
+                self._sock.sendall(data)
+            except OSError as e:
+                print('info-beamer {}: {}'.format(self.node, e))
+                self.failures += 1
+                self._disconnect()
+                time.sleep(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+                continue
+
+            self.sent += len(batch)
+            self.batches += 1
+            self.bytes_sent += len(data)
+            for _ in batch:
+                self._queue.task_done()
+
+            delay = self.RECONNECT_DELAY
+            batch = None
+
+    def stats(self):
+        return {
+            'connects': self.connects,
+            'failures': self.failures,
+            'sent': self.sent,
+            'batches': self.batches,
+            'bytes_sent': self.bytes_sent,
+            'dropped': self.dropped
+        }
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel(node):
+    with _channels_lock:
+        if node not in _channels:
+            _channels[node] = NodeChannel(node)
+
+        return _channels[node]
+
+
+def all_channels():
+    with _channels_lock:
+        return list(_channels.values())
+
+
+def flush_all(timeout=FLUSH_TIMEOUT):
+    for channel in all_channels():
+        channel.flush(timeout)
+
+
+atexit.register(flush_all)
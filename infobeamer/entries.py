@@ -0,0 +1,144 @@
+"""
+infoscreen: delta-encoded entry lists for info-beamer nodes
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import threading
+
+from .channel import get_channel
+
+
+def diff_entries(old, new):
+    """Return the operations turning the entry list `old` into `new`.
+
+    Operations use 1-based indexes and are applied in order:
+        ["del", idx]                  remove the entry at idx
+        ["ins", idx, entry]           insert entry at idx
+        ["set", idx, fields, unset]   update fields of the entry at idx, drop the keys in unset
+    """
+    prefix = 0
+    while prefix < len(old) and prefix < len(new) and old[prefix] == new[prefix]:
+        prefix += 1
+
+    suffix = 0
+    while (suffix < len(old) - prefix and suffix < len(new) - prefix
+           and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]):
+        suffix += 1
+
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+
+    ops = []
+    for i, (old_entry, new_entry) in enumerate(zip(old_middle, new_middle)):
+        fields = {key: value for key, value in new_entry.items() if old_entry.get(key) != value}
+        unset = [key for key in old_entry if key not in new_entry]
+        ops.append(['set', prefix + i + 1, fields, unset])
+
+    common = min(len(old_middle), len(new_middle))
+    for _ in range(len(old_middle) - common):
+        ops.append(['del', prefix + common + 1])
+    for i in range(common, len(new_middle)):
+        ops.append(['ins', prefix + i + 1, new_middle[i]])
+
+    return ops
+
+
+class EntrySync:
+    """Keep a node's entry list in sync with as little data as possible.
+
+    Every document carries a version `v`. The first update and every update after the
+    channel reconnected or dropped a line is a full {"v", "entries", "messages"} document;
+    all others are {"v", "base", "ops"} deltas against the previous version, with
+    "messages" only included when they changed.
+    """
+
+    def __init__(self, node):
+        self.full = 0
+        self.deltas = 0
+
+        self._channel = get_channel(node)
+        self._channel.on_connect(self.resync)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries = None
+        self._messages = None
+        self._dropped = self._channel.dropped
+
+    def _send_full(self):
+        self.full += 1
+        self._channel.send(json.dumps({
+            'v': self._version,
+            'entries': self._entries,
+            'messages': self._messages
+        }, ensure_ascii=False))
+
+    def update(self, entries, messages=()):
+        entries = [dict(entry) for entry in entries]
+        messages = list(messages)
+
+        with self._lock:
+            in_sync = self._entries is not None and self._dropped == self._channel.dropped
+            if in_sync and entries == self._entries and messages == self._messages:
+                return
+
+            self._version += 1
+            self._dropped = self._channel.dropped
+
+            if not in_sync:
+                self._entries = entries
+                self._messages = messages
+                self._send_full()
+                return
+
+            update = {
+                'v': self._version,
+                'base': self._version - 1,
+                'ops': diff_entries(self._entries, entries)
+            }
+            if messages != self._messages:
+                update['messages'] = messages
+
+            self._entries = entries
+            self._messages = messages
+            self.deltas += 1
+            self._channel.send(json.dumps(update, ensure_ascii=False))
+
+    def resync(self):
+        with self._lock:
+            if self._entries is None:
+                return
+
+            self._version += 1
+            self._dropped = self._channel.dropped
+            self._send_full()
+
+
+_syncs = {}
+_syncs_lock = threading.Lock()
+
+
+def get_entry_sync(node):
+    with _syncs_lock:
+        if node not in _syncs:
+            _syncs[node] = EntrySync(node)
+
+        return _syncs[node]
+
+
+def update_entries(node, entries, messages=()):
+    get_entry_sync(node).update(entries, messages)
@@ -0,0 +1,107 @@
+"""
+infoscreen: coalescing UDP notifier for info-beamer data_mapper paths
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import atexit
+import socket
+import threading
+import time
+
+from .config import IB_HOST, IB_PORT
+
+DEFAULT_WINDOW = 0.02
+
+
+class Notifier:
+    """Send `path:value` datagrams to info-beamer over one shared UDP socket.
+
+    Updates are collected for `window` seconds after the first one arrives and then sent
+    together, so related keys (title, artists, image, playing) reach the node in one
+    burst. If a path is updated again before the flush only its latest value is sent.
+    """
+
+    def __init__(self, host=IB_HOST, port=IB_PORT, window=DEFAULT_WINDOW):
+        self.address = (host, port)
+        self.window = window
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='ib-notify', daemon=True)
+        self._thread.start()
+
+        atexit.register(self.flush)
+
+    def notify(self, path, data='', flush=False):
+        with self._cond:
+            if path in self._pending:
+                self.merged += 1
+            self._pending[path] = data
+            self._cond.notify()
+
+        if flush:
+            self.flush()
+
+    def flush(self):
+        with self._cond:
+            pending = self._pending
+            self._pending = {}
+
+        for path, data in pending.items():
+            try:
+                self._sock.sendto('{}:{}'.format(path, data).encode(), self.address)
+                self.sent += 1
+            except OSError:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+            time.sleep(self.window)
+            self.flush()
+
+    def stats(self):
+        return {
+            'sent': self.sent,
+            'merged': self.merged,
+            'dropped': self.dropped
+        }
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier():
+    global _notifier
+
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = Notifier()
+
+        return _notifier
+
+
+def notify(path, data='', flush=False):
+    get_notifier().notify(path, data, flush)
@@ -0,0 +1,101 @@
+"""
+infoscreen: on-disk snapshot of the last payloads a dataloader pushed
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+from .assets import CACHE_DIR
+
+DEFAULT_MAX_AGE = 24 * 60 * 60
+# an unchanged value is written again once its saved time on disk is this old
+REFRESH_FRACTION = 0.25
+
+
+class Snapshot:
+    """The last good payloads of a dataloader, kept in `snapshot.<name>.json`.
+
+    A restarted daemon replays them to info-beamer right away instead of leaving the
+    screen empty until the first fetch returns. Values older than `max_age` are not
+    replayed; every `set()` counts as confirming the value, even if it did not change.
+    The file is written through a temporary file and a rename, so a power cut leaves
+    either the old or the new snapshot behind. It is rewritten when a value changed or
+    its saved time on disk falls behind by REFRESH_FRACTION of `max_age`, and at most
+    once per `min_interval` seconds to spare the SD card.
+    """
+
+    def __init__(self, name, path=None, max_age=DEFAULT_MAX_AGE, min_interval=0):
+        self.path = path or os.path.join(CACHE_DIR, 'snapshot.{}.json'.format(name))
+        self.max_age = max_age
+        self.min_interval = min_interval
+        self.writes = 0
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._written = None
+        try:
+            with open(self.path) as f:
+                self._values = json.load(f)
+        except (OSError, ValueError):
+            self._values = {}
+        self._on_disk = {key: entry['saved'] for key, entry in self._values.items()}
+
+    def get(self, key):
+        """Return the value saved as `key`, or None if there is none or it is too old."""
+        with self._lock:
+            entry = self._values.get(key)
+        if not entry or time.time() - entry['saved'] > self.max_age:
+            return None
+
+        return entry['value']
+
+    def set(self, key, value):
+        # compare the JSON form, tuples and lists are the same once saved
+        value = json.loads(json.dumps(value))
+        now = time.time()
+
+        with self._lock:
+            entry = self._values.get(key)
+            if (not entry or entry['value'] != value
+                    or now - self._on_disk.get(key, 0) > self.max_age * REFRESH_FRACTION):
+                self._dirty = True
+            self._values[key] = {'value': value, 'saved': now}
+
+            if not self._dirty or (self._written is not None and time.monotonic() - self._written < self.min_interval):
+                return
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._values, f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self.writes += 1
+                self._dirty = False
+                self._written = time.monotonic()
+                self._on_disk = {key: entry['saved'] for key, entry in self._values.items()}
+            except OSError as e:
+                print('saving snapshot {} failed: {!r}'.format(self.path, e))
+            finally:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
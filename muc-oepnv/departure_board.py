@@ -0,0 +1,106 @@
+"""
+infoscreen: merged departure board for several stations
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import heapq
+from itertools import islice
+from operator import itemgetter
+
+# fields of the tuples returned by MVGAPI.get_departures_list
+STATION_ID = 0
+DESTINATION = 1
+DEPARTURE_ID = 2
+DEPARTURE_TIME = 3
+PRODUCT = 4
+LABEL = 5
+LIVE = 6
+SEV = 7
+LINE_BACKGROUND_COLOR = 8
+
+DEFAULT_ROWS = 12
+DEFAULT_DEDUP_WINDOW = 5 * 60 * 1000
+
+_departure_time = itemgetter(DEPARTURE_TIME)
+
+
+def _sorted(departures):
+    for i in range(1, len(departures)):
+        if departures[i - 1][DEPARTURE_TIME] > departures[i][DEPARTURE_TIME]:
+            return sorted(departures, key=_departure_time)
+
+    return departures
+
+
+def merge_departures(departure_lists, rows=DEFAULT_ROWS, dedup_window=DEFAULT_DEDUP_WINDOW):
+    """k-way merge per-station departure lists into one list sorted by departure time.
+
+    A trip of the same line and destination which was already listed for another station
+    less than `dedup_window` milliseconds earlier is dropped. The merge stops as soon as
+    `rows` departures are collected, so the cost is O((rows + dropped) * log(stations)).
+    """
+    merged = heapq.merge(*[_sorted(departures) for departures in departure_lists], key=_departure_time)
+
+    last_seen = {}
+
+    def unique():
+        for departure in merged:
+            key = (departure[LABEL], departure[DESTINATION])
+            seen = last_seen.get(key)
+            if seen and seen[0] != departure[STATION_ID] and departure[DEPARTURE_TIME] - seen[1] < dedup_window:
+                continue
+
+            last_seen[key] = (departure[STATION_ID], departure[DEPARTURE_TIME])
+            yield departure
+
+    return list(islice(unique(), rows))
+
+
+class DepartureBoard(object):
+    """Poll several stations concurrently and present them as a single board."""
+
+    def __init__(self, async_mvgapi, station_ids, rows=DEFAULT_ROWS, dedup_window=DEFAULT_DEDUP_WINDOW,
+                 **departure_filters):
+        self._api = async_mvgapi
+        self._station_ids = list(station_ids)
+        self._rows = rows
+        self._dedup_window = dedup_window
+        self._departure_filters = departure_filters
+
+    @property
+    def station_ids(self):
+        return self._station_ids
+
+    async def fetch(self, timeout=None):
+        results = await asyncio.gather(*[
+            self._api.get_departures_list(station_id, timeout=timeout, **self._departure_filters)
+            for station_id in self._station_ids
+        ], return_exceptions=True)
+
+        departure_lists = []
+        for station_id, result in zip(self._station_ids, results):
+            if isinstance(result, Exception):
+                print('fetching departures for {} failed: {!r}'.format(station_id, result))
+                continue
+
+            departure_lists.append(result)
+
+        if self._station_ids and not departure_lists:
+            raise results[0]
+
+        return merge_departures(departure_lists, self._rows, self._dedup_window)
@@ -0,0 +1,115 @@
+"""
+infoscreen: change detection for departure pushes to info-beamer
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import time
+
+# departure fields which move with delays while the row itself stays the same
+TIME_FIELDS = ('timestamp', 'nice_date')
+DEFAULT_RESYNC_INTERVAL = 300
+
+
+def _encode(payload):
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf8')
+
+
+def _fingerprint(data):
+    return hashlib.sha1(data).digest()
+
+
+def _layout(payload):
+    """The payload without the time fields, i.e. what needs a full push when it changes."""
+    return {
+        'messages': payload['messages'],
+        'departures': [
+            {key: value for key, value in departure.items() if key not in TIME_FIELDS}
+            for departure in payload['departures']
+        ]
+    }
+
+
+class DeparturesPush(object):
+    """Decide what has to be sent for a departures payload.
+
+    diff() returns the bytes to push, or None if the node already shows the payload.
+    When only the time fields of some rows changed, a delta of the form
+    {"times": [[row, timestamp, nice_date], ...]} (rows 1-based) is returned instead
+    of the full document. A full push is forced every `resync_interval` seconds so a
+    restarted info-beamer gets its data back; call reset() after a failed send.
+    """
+
+    def __init__(self, resync_interval=DEFAULT_RESYNC_INTERVAL):
+        self._resync_interval = resync_interval
+        self._last_payload = None
+        self._last_fingerprint = None
+        self._last_layout = None
+        self._last_full = 0
+
+        self.skipped = 0
+        self.full = 0
+        self.deltas = 0
+        self.bytes_sent = 0
+
+    def reset(self):
+        self._last_payload = None
+        self._last_fingerprint = None
+        self._last_layout = None
+
+    def _remember(self, payload, fingerprint, layout):
+        self._last_payload = payload
+        self._last_fingerprint = fingerprint
+        self._last_layout = layout
+
+    def diff(self, payload):
+        data = _encode(payload)
+        fingerprint = _fingerprint(data)
+        now = time.monotonic()
+        resync = now - self._last_full >= self._resync_interval
+
+        if fingerprint == self._last_fingerprint and not resync:
+            self.skipped += 1
+            return None
+
+        layout = _fingerprint(_encode(_layout(payload)))
+        if layout == self._last_layout and not resync:
+            times = []
+            for row, (old, new) in enumerate(zip(self._last_payload['departures'], payload['departures']), 1):
+                if any(old[key] != new[key] for key in TIME_FIELDS):
+                    times.append([row] + [new[key] for key in TIME_FIELDS])
+
+            delta = _encode({'times': times})
+            self._remember(payload, fingerprint, layout)
+            self.deltas += 1
+            self.bytes_sent += len(delta)
+            return delta
+
+        self._remember(payload, fingerprint, layout)
+        self._last_full = now
+        self.full += 1
+        self.bytes_sent += len(data)
+        return data
+
+    def stats(self):
+        return {
+            'skipped': self.skipped,
+            'full': self.full,
+            'deltas': self.deltas,
+            'bytes_sent': self.bytes_sent
+        }
@@ -0,0 +1,158 @@
+"""
+infoscreen: incremental decoding of large JSON responses
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import codecs
+import json
+import re
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_END = frozenset(',]} \t\n\r')
+
+
+class _Reader(object):
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+
+        text = ''
+        while not text:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                text = self._decoder.decode(b'', final=True)
+                break
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+
+        return bool(text) or not self._eof
+
+    def peek(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def next_char(self):
+        char = self.peek()
+        self._pos += 1
+        return char
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError('expected {!r} at offset {}, found {!r}'.format(char, self._pos, found))
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # raw_decode stops early on a number split across chunks, e.g. at `3.` or `1e`
+            if self._split_number(value, end) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def _split_number(self, value, end):
+        if self._eof or isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+
+        return end == len(self._buf) or self._buf[end] not in _NUMBER_END
+
+    def items(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield self.value()
+
+            char = self.next_char()
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError('expected \',\' or \']\' in array, found {!r}'.format(char))
+
+
+def iter_array(chunks, key=None, meta=None):
+    """Yield the elements of a JSON array one at a time.
+
+    `chunks` is an iterable of bytes or str, e.g. response.iter_content(). Without `key`
+    the document itself must be an array; otherwise it must be an object and the array
+    stored under `key` is streamed. The other members of that object are decoded
+    normally and stored in `meta` as they are passed; members after the array are only
+    available once the generator is exhausted.
+    """
+    reader = _Reader(chunks)
+
+    if key is None:
+        yield from reader.items()
+        return
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(':')
+
+        if name == key:
+            yield from reader.items()
+        else:
+            value = reader.value()
+            if meta is not None:
+                meta[name] = value
+
+        char = reader.next_char()
+        if char == '}':
+            return
+        if char != ',':
+            raise ValueError('expected \',\' or \'}}\' in object, found {!r}'.format(char))
+
+
+def iter_response(response, key=None, meta=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """iter_array() over a streamed requests response, closing it when done."""
+    try:
+        yield from iter_array(response.iter_content(chunk_size), key, meta)
+    finally:
+        response.close()
@@ -0,0 +1,147 @@
+"""
+infoscreen: indexed store of MVG service messages
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+
+import mvg_api
+
+
+def _add(index, key, message_id):
+    index.setdefault(key, set()).add(message_id)
+
+
+def _discard(index, key, message_id):
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(message_id)
+        if not ids:
+            del index[key]
+
+
+class MessageStore(object):
+    """Messages of the last poll, indexed by line number, product and type.
+
+    update() takes the raw `messages` payload. Messages whose raw JSON is unchanged since
+    the previous poll keep their parsed Message and index entries; only new or edited
+    messages are parsed.
+    """
+
+    def __init__(self):
+        self._status = None
+        self._raw = {}
+        self._messages = {}
+        self._order = []
+        self._by_line = {}
+        self._by_product = {}
+        self._by_type = {}
+
+        self.parsed = 0
+        self.reused = 0
+
+    @property
+    def status(self):
+        return self._status
+
+    def __len__(self):
+        return len(self._order)
+
+    def _index(self, message):
+        _add(self._by_type, message.type, message.id)
+        for line in message.lines:
+            _add(self._by_line, line.line_number, message.id)
+            _add(self._by_product, line.product, message.id)
+
+    def _unindex(self, message):
+        _discard(self._by_type, message.type, message.id)
+        for line in message.lines:
+            _discard(self._by_line, line.line_number, message.id)
+            _discard(self._by_product, line.product, message.id)
+
+    def update(self, data):
+        self._status = data.get('status')
+
+        order = []
+        seen = set()
+        for raw_message in data['messages']:
+            message_id = raw_message['id']
+            order.append(message_id)
+            seen.add(message_id)
+
+            if self._raw.get(message_id) == raw_message:
+                self.reused += 1
+                continue
+
+            old = self._messages.get(message_id)
+            if old is not None:
+                self._unindex(old)
+
+            lines = mvg_api.Line.from_json_list(raw_message.get('lines', ()))
+            message = mvg_api.Message.from_json(raw_message, lines)
+            self._raw[message_id] = raw_message
+            self._messages[message_id] = message
+            self._index(message)
+            self.parsed += 1
+
+        for message_id in set(self._messages) - seen:
+            self._unindex(self._messages.pop(message_id))
+            del self._raw[message_id]
+
+        self._order = order
+
+    def refresh(self, mvgapi):
+        self.update(mvgapi.get_messages_data())
+
+    def query(self, types=None, lines=None, products=None, active=False, now=None):
+        """Return the messages matching every given filter, in payload order.
+
+        `types`, `lines` and `products` are sets; a message matches a set if it has at least
+        one of its members. With `active`, only messages valid at `now` (ms, default: the
+        current time) are returned.
+        """
+        ids = None
+        for index, keys in ((self._by_type, types), (self._by_line, lines), (self._by_product, products)):
+            if keys is None:
+                continue
+
+            matches = set()
+            for key in keys:
+                matches |= index.get(key, set())
+
+            ids = matches if ids is None else ids & matches
+            if not ids:
+                return []
+
+        if active and now is None:
+            now = time.time() * 1000
+
+        result = []
+        for message_id in self._order:
+            if ids is not None and message_id not in ids:
+                continue
+
+            message = self._messages[message_id]
+            if active:
+                if message.valid_from is not None and message.valid_from > now:
+                    continue
+                if message.valid_to is not None and message.valid_to < now:
+                    continue
+
+            result.append(message)
+
+        return result
@@ -17,10 +17,21 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+from operator import itemgetter
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import json_stream
 
 DEFAULT_BASE_URL = 'https://apps.mvg-fahrinfo.de/v12/rest/12.0/'
 DEFAULT_API_KEY = ''
+DEFAULT_STATION_HASH = '64bfd16917ce3fbc5585bc14e4dee26a'
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = (5, 15)
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.5
 
 
 class UnexpectedResponseCodeException(Exception):
@@ -34,6 +45,10 @@ class UnexpectedResponseCodeException(Exception):
 
 
 class Station(object):
+    __slots__ = ('_type', '_latitude', '_longitude', '_id', '_place', '_name', '_has_live_data',
+                  '_has_zoom_data', '_products', '_aliases', '_link')
+    _json_fields = itemgetter('type', 'latitude', 'longitude', 'id', 'place', 'name', 'hasLiveData',
+                           'hasZoomData', 'products', 'aliases')
 
     def __init__(self, type, latitude, longitude, id, place, name, has_live_data, has_zoom_data,
                  products, aliases, link=None):
@@ -49,6 +64,32 @@ class Station(object):
         self._aliases = aliases
         self._link = link
 
+    @classmethod
+    def from_json(cls, raw):
+        return cls(*cls._json_fields(raw))
+
+    @classmethod
+    def from_json_list(cls, raws):
+        # stationData has thousands of entries, fill the slots without going through __init__
+        new = object.__new__
+        stations = []
+        for raw in raws:
+            station = new(cls)
+            station._type = raw['type']
+            station._latitude = raw['latitude']
+            station._longitude = raw['longitude']
+            station._id = raw['id']
+            station._place = raw['place']
+            station._name = raw['name']
+            station._has_live_data = raw['hasLiveData']
+            station._has_zoom_data = raw['hasZoomData']
+            station._products = raw['products']
+            station._aliases = raw['aliases']
+            station._link = None
+            stations.append(station)
+
+        return stations
+
     @property
     def type(self):
         return self._type
@@ -95,6 +136,7 @@ class Station(object):
 
 
 class StationResponse(object):
+    __slots__ = ('_hash', '_version', '_stations')
 
     def __init__(self, hash, version, stations):
         self._hash = hash
@@ -115,6 +157,8 @@ class StationResponse(object):
 
 
 class Line(object):
+    __slots__ = ('_diva_id', '_line_number', '_product', '_sev', '_destination', '_partial_net')
+    _json_fields = itemgetter('divaId', 'lineNumber', 'product', 'sev')
 
     def __init__(self, diva_id, line_number, product, sev, destination=None, partial_net=None):
         self._diva_id = diva_id
@@ -124,6 +168,15 @@ class Line(object):
         self._destination = destination
         self._partial_net = partial_net
 
+    @classmethod
+    def from_json(cls, raw):
+        return cls(*cls._json_fields(raw), raw.get('destination'), raw.get('partialNet'))
+
+    @classmethod
+    def from_json_list(cls, raws):
+        fields = cls._json_fields
+        return [cls(*fields(raw), raw.get('destination'), raw.get('partialNet')) for raw in raws]
+
     @property
     def diva_id(self):
         return self._diva_id
@@ -150,6 +203,8 @@ class Line(object):
 
 
 class Message(object):
+    __slots__ = ('_id', '_type', '_lines', '_title', '_description', '_publication', '_valid_from', '_valid_to')
+    _json_fields = itemgetter('title', 'description', 'publication', 'validFrom')
 
     def __init__(self, id, type, lines, title, description, publication, valid_from, valid_to=None):
         self._id = id
@@ -161,6 +216,10 @@ class Message(object):
         self._valid_from = valid_from
         self._valid_to = valid_to
 
+    @classmethod
+    def from_json(cls, raw, lines):
+        return cls(raw['id'], raw['type'], lines, *cls._json_fields(raw), raw.get('validTo'))
+
     @property
     def id(self):
         return self._id
@@ -195,6 +254,7 @@ class Message(object):
 
 
 class MessagesResponse(object):
+    __slots__ = ('_status', '_messages')
 
     def __init__(self, status, messages):
         self._status = status
@@ -210,6 +270,10 @@ class MessagesResponse(object):
 
 
 class TransportDevice(object):
+    __slots__ = ('_status', '_name', '_identifier', '_xcoordinate', '_ycoordinate', '_description', '_type',
+                  '_last_update', '_oos_since', '_oos_until', '_oos_description')
+    _json_fields = itemgetter('status', 'name', 'identifier', 'xcoordinate', 'ycoordinate', 'description',
+                           'type')
 
     def __init__(self, status, name, identifier, xcoordinate, ycoordinate, description, type,
                  last_update, oos_since=None, oos_until=None, oos_description=None):
@@ -225,6 +289,15 @@ class TransportDevice(object):
         self._oos_until = oos_until
         self._oos_description = oos_description
 
+    @classmethod
+    def from_json(cls, raw):
+        planned = raw.get('planned')
+        if planned:
+            return cls(*cls._json_fields(raw), raw.get('lastUpdate', -1),
+                       planned['since'], planned['until'], planned['description'])
+
+        return cls(*cls._json_fields(raw), raw.get('lastUpdate', -1))
+
     @property
     def status(self):
         return self._status
@@ -271,6 +344,7 @@ class TransportDevice(object):
 
 
 class ZoomResponse(object):
+    __slots__ = ('_station_id', '_name', '_transport_devices')
 
     def __init__(self, station_id, name, transport_devices):
         self._station_id = station_id
@@ -291,18 +365,26 @@ class ZoomResponse(object):
 
 
 class Departure(object):
+    __slots__ = ('_departure_time', '_product', '_label', '_destination', '_live', '_line_background_color',
+                  '_departure_id', '_sev')
+    _json_fields = itemgetter('departureTime', 'product', 'label', 'destination', 'live', 'lineBackgroundColor',
+                           'departureId', 'sev')
 
     def __init__(self, departure_time, product, label, destination, live, line_background_color,
                  departure_id, sev):
         self._departure_time = departure_time
         self._product = product
-        self._label = destination
+        self._label = label
         self._destination = destination
         self._live = live
         self._line_background_color = line_background_color
         self._departure_id = departure_id
         self._sev = sev
 
+    @classmethod
+    def from_json(cls, raw):
+        return cls(*cls._json_fields(raw))
+
     @property
     def departure_time(self):
         return self._departure_time
@@ -338,10 +420,28 @@ class Departure(object):
 
 class MVGAPI(object):
 
-    def __init__(self, base_url=DEFAULT_BASE_URL, api_key=DEFAULT_API_KEY, user_agent='MVG Fahrinfo Android 6.6'):
+    def __init__(self, base_url=DEFAULT_BASE_URL, api_key=DEFAULT_API_KEY, user_agent='MVG Fahrinfo Android 6.6',
+                 pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR):
         self._base_url = base_url
         self._api_key = api_key
         self._user_agent = user_agent
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff_factor = backoff_factor
+        self._session = self._create_session(pool_size, retries, backoff_factor)
+
+    def _create_session(self, pool_size, retries, backoff_factor):
+        retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(500, 502, 503, 504), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.headers.update(self._generate_headers())
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        return session
 
     def _generate_headers(self):
         return {
@@ -349,107 +449,121 @@ class MVGAPI(object):
             'Accept': 'application/json'
         }
 
-    def _authenticated_request(self, method, endpoint, params={}, data=None):
+    def _authenticated_request(self, method, endpoint, params=None, data=None, stream=False):
+        params = dict(params or {})
         params['apiKey'] = self._api_key
-        response = requests.request(method=method, url=self._base_url + endpoint,
-                                    headers=self._generate_headers(), params=params, data=data)
+        response = self._session.request(method=method, url=self._base_url + endpoint,
+                                         params=params, data=data, timeout=self._timeout, stream=stream)
 
         if response.status_code == requests.codes.ok:
             return response
         else:
+            response.close()
             raise UnexpectedResponseCodeException(response.status_code)
 
-    def _get_stations(self, data_hash='64bfd16917ce3fbc5585bc14e4dee26a', version=0):
+    def request_budget(self):
+        """Seconds a request may block when every attempt runs into the timeouts."""
+        connect, read = self._timeout if isinstance(self._timeout, tuple) else (self._timeout, self._timeout)
+        backoff = sum(self._backoff_factor * 2 ** retry for retry in range(self._retries))
+
+        return (self._retries + 1) * (connect + read) + backoff
+
+    def connection_stats(self):
+        """Return request and connection counters of the pooled session.
+
+        `reused` is the number of requests which did not need a new TCP/TLS handshake.
+        """
+        requests_sent = 0
+        connections = 0
+
+        for adapter in set(self._session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+
+        return {
+            'requests': requests_sent,
+            'connections': connections,
+            'reused': max(requests_sent - connections, 0)
+        }
+
+    def close(self):
+        self._session.close()
+
+    def _get_stations(self, data_hash=DEFAULT_STATION_HASH, version=0, stream=False):
         params = {
             'hash': data_hash,
             'version': version
         }
 
-        return self._authenticated_request('GET', 'dynamicdata/stationData', params)
+        return self._authenticated_request('GET', 'dynamicdata/stationData', params, stream=stream)
 
-    def get_stations(self, data_hash='64bfd16917ce3fbc5585bc14e4dee26a', version=0):
+    def get_stations(self, data_hash=DEFAULT_STATION_HASH, version=0):
         response = self._get_stations(data_hash, version)
         data = response.json()
 
-        stations = []
-        for station in data['stations']:
-            stations.append(Station(station['type'], station['latitude'], station['longitude'],
-                                    station['id'], station['place'], station['name'],
-                                    station['hasLiveData'], station['hasZoomData'],
-                                    station['products'], station['aliases']))
+        stations = Station.from_json_list(data['stations'])
 
         return StationResponse(data['hash'], data['version'], stations)
 
-    def _get_lines(self):
-        return self._authenticated_request('GET', 'dynamicdata/lines')
+    def iter_stations(self, data_hash=DEFAULT_STATION_HASH, version=0, meta=None):
+        """Stream the station list, yielding one Station at a time.
+
+        `hash` and `version` of the response are stored in `meta` once they were read.
+        """
+        response = self._get_stations(data_hash, version, stream=True)
+
+        for station in json_stream.iter_response(response, 'stations', meta):
+            yield Station.from_json(station)
+
+    def _get_lines(self, stream=False):
+        return self._authenticated_request('GET', 'dynamicdata/lines', stream=stream)
 
     def get_lines(self):
         response = self._get_lines()
         data = response.json()
 
-        lines = []
-        for raw_line in data:
-            line = Line(raw_line['divaId'], raw_line['lineNumber'], raw_line['product'], raw_line['sev'])
-            if 'partialNet' in raw_line:
-                line._partial_net = raw_line['partialNet']
-
-            lines.append(line)
+        lines = Line.from_json_list(data)
 
         return lines
 
+    def iter_lines(self):
+        response = self._get_lines(stream=True)
+
+        for line in json_stream.iter_response(response):
+            yield Line.from_json(line)
+
     def _get_messages(self):
         return self._authenticated_request('GET', 'messages')
 
-    def get_messages(self, ubahn=True, sbahn=False, tram=False, bus=True, regiobus=False):
-        response = self._get_messages()
-        data = response.json()
+    def get_messages_data(self):
+        return self._get_messages().json()
+
+    def get_messages(self, ubahn=True, sbahn=False, tram=False, bus=True, regiobus=False, products=None):
+        if products is None:
+            products = {product for product, enabled in (('UBAHN', ubahn), ('SBAHN', sbahn), ('TRAM', tram),
+                                                         ('BUS', bus), ('REGIONAL_BUS', regiobus)) if enabled}
+
+        data = self.get_messages_data()
 
         messages = []
         for raw_message in data['messages']:
-            match = False
-            lines = []
-            if 'lines' in raw_message:
-                for raw_line in raw_message['lines']:
-                    line = Line(raw_line['divaId'], raw_line['lineNumber'], raw_line['product'], raw_line['sev'])
-                    if 'destination' in raw_line:
-                        line._destination = raw_line['destination']
-                    if 'partialNet' in raw_line:
-                        line._partial_net = raw_line['partialNet']
-
-                    lines.append(line)
-
-                    product = line.product
-                    if ubahn and product == 'UBAHN':
-                        match = True
-                    elif sbahn and product == 'SBAHN':
-                        match = True
-                    elif tram and product == 'TRAM':
-                        match = True
-                    elif bus and product == 'BUS':
-                        match = True
-                    elif regiobus and product == 'REGIONAL_BUS':
-                        match = True
-
-            if not match:
+            if 'lines' not in raw_message:
                 continue
 
+            lines = Line.from_json_list(raw_message['lines'])
+            if not any(line.product in products for line in lines):
+                continue
 
-            message = Message(raw_message['id'],
-                              raw_message['type'],
-                              lines,
-                              raw_message['title'],
-                              raw_message['description'],
-                              raw_message['publication'],
-                              raw_message['validFrom'])
-            if 'validTo' in raw_message:
-                message._valid_to = raw_message['validTo']
-
+            message = Message.from_json(raw_message, lines)
             messages.append(message)
 
         return MessagesResponse(data['status'], messages)
 
-    def _get_zoom_data(self, station_id):
-        response = self._authenticated_request('GET', 'zoom/{}'.format(station_id))
+    def _get_zoom_data(self, station_id, stream=False):
+        response = self._authenticated_request('GET', 'zoom/{}'.format(station_id), stream=stream)
 
         return response
 
@@ -457,35 +571,18 @@ class MVGAPI(object):
         response = self._get_zoom_data(station_id)
         data = response.json()
 
-        transport_devices = []
-        for transport_device in data['transportDevices']:
-            if 'lastUpdate' not in transport_device:
-                transport_device['lastUpdate'] = -1
-
-            if 'planned' in transport_device:
-                transport_devices.append(TransportDevice(transport_device['status'],
-                                                         transport_device['name'],
-                                                         transport_device['identifier'],
-                                                         transport_device['xcoordinate'],
-                                                         transport_device['ycoordinate'],
-                                                         transport_device['description'],
-                                                         transport_device['type'],
-                                                         transport_device['lastUpdate'],
-                                                         transport_device['planned']['since'],
-                                                         transport_device['planned']['until'],
-                                                         transport_device['planned']['description']))
-            else:
-                transport_devices.append(TransportDevice(transport_device['status'],
-                                                         transport_device['name'],
-                                                         transport_device['identifier'],
-                                                         transport_device['xcoordinate'],
-                                                         transport_device['ycoordinate'],
-                                                         transport_device['description'],
-                                                         transport_device['type'],
-                                                         transport_device['lastUpdate']))
+        transport_devices = [TransportDevice.from_json(transport_device)
+                             for transport_device in data['transportDevices']]
 
         return ZoomResponse(data['efaId'], data['name'], transport_devices)
 
+    def iter_zoom_data(self, station_id, meta=None):
+        """Stream the transport devices of a station, `efaId` and `name` end up in `meta`."""
+        response = self._get_zoom_data(station_id, stream=True)
+
+        for transport_device in json_stream.iter_response(response, 'transportDevices', meta):
+            yield TransportDevice.from_json(transport_device)
+
     def _get_departures(self, station_id, ubahn=True, sbahn=False, tram=False, bus=True, zug=False):
         station_id = str(station_id)
         if not station_id.startswith('de:09162:'):
@@ -510,10 +607,7 @@ class MVGAPI(object):
             if not regiobus and departure['product'] == 'REGIONAL_BUS':
                 continue
 
-            departures.append(Departure(departure['departureTime'], departure['product'],
-                                        departure['label'], departure['destination'],
-                                        departure['live'], departure['lineBackgroundColor'],
-                                        departure['departureId'], departure['sev']))
+            departures.append(Departure.from_json(departure))
 
         return departures
 
@@ -0,0 +1,130 @@
+"""
+infoscreen: asyncio front-end for the MVG API
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import mvg_api
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CALL_TIMEOUT = 10
+
+
+class AsyncMVGAPI(object):
+    """Run MVGAPI calls concurrently from asyncio.
+
+    Every call is executed by the blocking MVGAPI on a small thread pool, so parsing and
+    model classes are shared with the synchronous client and the pooled keep-alive session
+    is reused. At most `concurrency` requests are in flight, and each call is bounded by
+    its own timeout. A call that timed out keeps its worker thread until the blocking
+    request gives up, so the pool has room for those next to the calls in flight.
+    """
+
+    def __init__(self, mvgapi=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_CALL_TIMEOUT, **kwargs):
+        if mvgapi is None:
+            kwargs.setdefault('pool_size', concurrency)
+            mvgapi = mvg_api.MVGAPI(**kwargs)
+
+        self._api = mvgapi
+        self._concurrency = concurrency
+        self._timeout = timeout
+        abandoned = math.ceil(mvgapi.request_budget() / timeout)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency * (1 + abandoned))
+        self._semaphores = {}
+
+    @property
+    def api(self):
+        return self._api
+
+    def _semaphore(self):
+        # asyncio primitives are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            self._semaphores = {loop: asyncio.Semaphore(self._concurrency)}
+            semaphore = self._semaphores[loop]
+
+        return semaphore
+
+    async def _limited(self, func, *args, **kwargs):
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _call(self, func, *args, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self._timeout
+
+        return await asyncio.wait_for(self._limited(func, *args, **kwargs), timeout)
+
+    async def get_stations(self, *args, timeout=None, **kwargs):
+        return await self._call(self._api.get_stations, *args, timeout=timeout, **kwargs)
+
+    async def get_lines(self, timeout=None):
+        return await self._call(self._api.get_lines, timeout=timeout)
+
+    async def get_messages(self, *args, timeout=None, **kwargs):
+        return await self._call(self._api.get_messages, *args, timeout=timeout, **kwargs)
+
+    async def get_messages_data(self, timeout=None):
+        return await self._call(self._api.get_messages_data, timeout=timeout)
+
+    async def get_zoom_data(self, station_id, timeout=None):
+        return await self._call(self._api.get_zoom_data, station_id, timeout=timeout)
+
+    async def get_departures(self, station_id, *args, timeout=None, **kwargs):
+        return await self._call(self._api.get_departures, station_id, *args, timeout=timeout, **kwargs)
+
+    async def get_departures_list(self, station_id, *args, timeout=None, **kwargs):
+        return await self._call(self._api.get_departures_list, station_id, *args, timeout=timeout, **kwargs)
+
+    async def poll(self, station_ids, messages=None, zoom_station_ids=(), timeout=None, **departure_filters):
+        """Fetch departures of several stations, messages and zoom data at the same time.
+
+        `messages` holds the keyword arguments for get_messages, None skips them. Failed or
+        timed out calls are returned as their exception instead of cancelling the others:
+
+            {'departures': {station_id: [Departure] | Exception},
+             'messages': MessagesResponse | Exception | None,
+             'zoom': {station_id: ZoomResponse | Exception}}
+        """
+        station_ids = list(station_ids)
+        zoom_station_ids = list(zoom_station_ids)
+
+        calls = [self.get_departures(station_id, timeout=timeout, **departure_filters) for station_id in station_ids]
+        calls += [self.get_zoom_data(station_id, timeout=timeout) for station_id in zoom_station_ids]
+        if messages is not None:
+            calls.append(self.get_messages(timeout=timeout, **messages))
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        departures = dict(zip(station_ids, results[:len(station_ids)]))
+        zoom = dict(zip(zoom_station_ids, results[len(station_ids):len(station_ids) + len(zoom_station_ids)]))
+
+        return {
+            'departures': departures,
+            'messages': results[-1] if messages is not None else None,
+            'zoom': zoom
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._api.close()
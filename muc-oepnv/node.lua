@@ -40,9 +40,21 @@ util.data_mapper{
 }
 
 node.event("input", function(line, client)
-    data = json.decode(line)
+    local update = json.decode(line)
+    if update.times then
+        for idx, row in ipairs(update.times) do
+            local dep = data.departures[row[1]]
+            if dep then
+                dep.timestamp = row[2]
+                dep.nice_date = row[3]
+            end
+        end
+        print("departures delta update")
+    else
+        data = update
+        print("departures data update")
+    end
     N.data = data
-    print("departures data update")
 
     schedule.update()
 end)
@@ -71,6 +83,8 @@ function draw_departures(msg_y, now)
     local y = 30 + msg_y
     local now = unixnow()
     local lcount = 0
+    -- replayed from the snapshot until the first fetch after a restart
+    local alpha = data.stale and 0.5 or 1
 
     for idx, dep in ipairs(data.departures) do
         if dep.timestamp > now then
@@ -91,14 +105,14 @@ function draw_departures(msg_y, now)
             if remaining < 5 or lcount < 2 then
                 lcount = lcount + 1
                 util.draw_correct(_G[dep.icon], 10, y, 140, y + FSIZE_DEPARTURE, 0.9)
-                font:write(150, y, "› " .. dep.destination, FSIZE_DEPARTURE_LARGE, 0, 0, 0, 1)
+                font:write(150, y, "› " .. dep.destination, FSIZE_DEPARTURE_LARGE, 0, 0, 0, alpha)
                 y = y + FSIZE_DEPARTURE_LARGE + 5
-                font:write(150, y, time .. " / " .. append, FSIZE_DEPARTURE, 0, 0, 0, 1)
+                font:write(150, y, time .. " / " .. append, FSIZE_DEPARTURE, 0, 0, 0, alpha)
                 y = y + FSIZE_DEPARTURE_LARGE + 5
             else
                 util.draw_correct(_G[dep.icon], 10, y, 140, y + FSIZE_DEPARTURE, 0.9)
-                font:write(150, y, time, FSIZE_DEPARTURE, 0, 0, 0, 1)
-                font:write(300, y, dep.destination, FSIZE_DEPARTURE, 0, 0, 0, 1)
+                font:write(150, y, time, FSIZE_DEPARTURE, 0, 0, 0, alpha)
+                font:write(300, y, dep.destination, FSIZE_DEPARTURE, 0, 0, 0, alpha)
                 y = y + FSIZE_DEPARTURE_LARGE + 5
             end
 
@@ -0,0 +1,163 @@
+"""
+infoscreen: on-disk cache of the MVG station catalog
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import pickle
+import sys
+from operator import attrgetter
+
+import mvg_api
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from infobeamer.assets import CACHE_DIR
+
+CATALOG_PATH = os.path.join(CACHE_DIR, 'stations.catalog')
+CATALOG_MAGIC = b'MVGCAT1\n'
+
+_station_fields = attrgetter(*mvg_api.Station.__slots__)
+
+
+class StationCatalog(object):
+    """Last StationResponse of the MVG API, persisted in the infoscreen cache directory.
+
+    The file starts with a short JSON header holding hash, version and station count,
+    followed by the pickled station tuples. The header is read on construction, the
+    stations only on first access, so asking the API for changes costs no decoding.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self._path = path
+        self._hash = None
+        self._version = None
+        self._count = 0
+        self._stations = None
+        self._by_id = None
+
+        self._read_header()
+
+    def _read_header(self):
+        try:
+            with open(self._path, 'rb') as f:
+                if f.readline() != CATALOG_MAGIC:
+                    return
+                header = json.loads(f.readline().decode('utf-8'))
+        except (OSError, ValueError):
+            return
+
+        self._hash = header['hash']
+        self._version = header['version']
+        self._count = header['count']
+
+    def _load(self):
+        stations = []
+
+        try:
+            with open(self._path, 'rb') as f:
+                f.readline()
+                f.readline()
+                stations = [mvg_api.Station(*fields) for fields in pickle.load(f)]
+        except (OSError, EOFError, pickle.UnpicklingError, TypeError, ValueError):
+            self._hash = None
+            self._version = None
+            self._count = 0
+
+        self._stations = stations
+        self._by_id = None
+
+    def _save(self):
+        header = {
+            'hash': self._hash,
+            'version': self._version,
+            'count': len(self._stations)
+        }
+
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(CATALOG_MAGIC)
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            pickle.dump([_station_fields(station) for station in self._stations], f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path)
+
+    @property
+    def hash(self):
+        return self._hash
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def stations(self):
+        if self._stations is None:
+            self._load()
+
+        return self._stations
+
+    def __len__(self):
+        if self._stations is None:
+            return self._count
+
+        return len(self._stations)
+
+    def is_empty(self):
+        return self._hash is None
+
+    def get(self, station_id):
+        if self._by_id is None:
+            self._by_id = {station.id: station for station in self.stations}
+
+        return self._by_id.get(station_id)
+
+    def apply(self, response):
+        """Store a StationResponse unless it matches the cached hash/version.
+
+        Returns True if the catalog changed.
+        """
+        if response.hash == self._hash and response.version == self._version:
+            return False
+        if not response.stations and not self.is_empty():
+            return False
+
+        self._hash = response.hash
+        self._version = response.version
+        self._stations = response.stations
+        self._count = len(response.stations)
+        self._by_id = None
+        self._save()
+
+        return True
+
+    def refresh(self, mvgapi):
+        """Ask the API for changes since the cached hash/version and apply them."""
+        meta = {}
+        if self.is_empty():
+            stations = list(mvgapi.iter_stations(meta=meta))
+        else:
+            stations = list(mvgapi.iter_stations(self._hash, self._version, meta))
+
+        return self.apply(mvg_api.StationResponse(meta['hash'], meta['version'], stations))
+
+    def ensure(self, mvgapi):
+        """Download the catalog only if nothing has been cached yet."""
+        if self.is_empty():
+            return self.refresh(mvgapi)
+
+        return False
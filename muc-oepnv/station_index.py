@@ -0,0 +1,153 @@
+"""
+infoscreen: spatial index over the MVG station catalog
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import heapq
+import math
+
+EARTH_RADIUS = 6371008.8
+DEFAULT_CELL_SIZE = 500
+
+
+class StationIndex(object):
+    """Uniform grid over station coordinates.
+
+    Coordinates are projected equirectangularly around the mean latitude of the catalog.
+    East-west distances are therefore off by about tan(lat0) * (lat - lat0) in radians,
+    i.e. about 1% (5 m at 500 m) half a degree north or south of the mean, on top of up
+    to 0.5% for treating the Earth as a sphere. Stations a few metres apart may swap
+    places in the ranking. Queries only visit the grid cells around the query point.
+    """
+
+    def __init__(self, stations, cell_size=DEFAULT_CELL_SIZE):
+        self._cell_size = cell_size
+        self._grid = {}
+
+        stations = [station for station in stations
+                    if station.latitude is not None and station.longitude is not None]
+        if stations:
+            lat0 = sum(station.latitude for station in stations) / len(stations)
+        else:
+            lat0 = 0
+        self._cos_lat0 = math.cos(math.radians(lat0))
+
+        for station in stations:
+            x, y = self._project(station.latitude, station.longitude)
+            self._grid.setdefault(self._cell(x, y), []).append((x, y, station))
+
+        if self._grid:
+            self._min_cx = min(cx for cx, cy in self._grid)
+            self._max_cx = max(cx for cx, cy in self._grid)
+            self._min_cy = min(cy for cx, cy in self._grid)
+            self._max_cy = max(cy for cx, cy in self._grid)
+
+        self._size = len(stations)
+
+    def __len__(self):
+        return self._size
+
+    def _project(self, lat, lng):
+        return (EARTH_RADIUS * math.radians(float(lng)) * self._cos_lat0,
+                EARTH_RADIUS * math.radians(float(lat)))
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self._cell_size)), int(math.floor(y / self._cell_size))
+
+    def _max_ring(self, cx, cy):
+        return max(abs(cx - self._min_cx), abs(cx - self._max_cx),
+                   abs(cy - self._min_cy), abs(cy - self._max_cy))
+
+    def _ring(self, cx, cy, ring):
+        if ring == 0:
+            yield cx, cy
+            return
+
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+    @staticmethod
+    def _matches(station, live_only, product):
+        if live_only and not station.has_live_data:
+            return False
+        if product is not None and product not in (station.products or ()):
+            return False
+
+        return True
+
+    def nearest(self, lat, lng, k=1, radius=None, live_only=False, product=None):
+        """Return up to k (distance in metres, Station) tuples, closest first."""
+        if not self._grid or k <= 0:
+            return []
+
+        x, y = self._project(lat, lng)
+        cx, cy = self._cell(x, y)
+        max_ring = self._max_ring(cx, cy)
+        if radius is not None:
+            max_ring = min(max_ring, int(math.ceil(radius / self._cell_size)) + 1)
+
+        # max-heap of the best k candidates as (-distance, counter, station)
+        best = []
+        counter = 0
+        for ring in range(max_ring + 1):
+            # every station in this ring or beyond is at least this far away
+            if len(best) == k and (ring - 1) * self._cell_size > -best[0][0]:
+                break
+
+            for cell in self._ring(cx, cy, ring):
+                for sx, sy, station in self._grid.get(cell, ()):
+                    if not self._matches(station, live_only, product):
+                        continue
+
+                    distance = math.hypot(sx - x, sy - y)
+                    if radius is not None and distance > radius:
+                        continue
+
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, counter, station))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, counter, station))
+
+        return [(-distance, station) for distance, _, station in sorted(best, reverse=True)]
+
+    def within(self, lat, lng, radius, live_only=False, product=None):
+        """Return all (distance in metres, Station) tuples within radius, closest first."""
+        if not self._grid:
+            return []
+
+        x, y = self._project(lat, lng)
+        reach = int(math.ceil(radius / self._cell_size))
+        cx, cy = self._cell(x, y)
+
+        result = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for sx, sy, station in self._grid.get((cx + dx, cy + dy), ()):
+                    if not self._matches(station, live_only, product):
+                        continue
+
+                    distance = math.hypot(sx - x, sy - y)
+                    if distance <= radius:
+                        result.append((distance, station))
+
+        result.sort(key=lambda item: item[0])
+        return result
@@ -0,0 +1,230 @@
+"""
+infoscreen: conditional RSS/Atom feed fetching for the sidebar news
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import heapq
+import re
+import threading
+from calendar import timegm
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+import feedparser
+import requests
+
+DEFAULT_TIMEOUT = (5, 10)
+DEFAULT_DEADLINE = 10
+DEFAULT_LIMIT = 3
+DEFAULT_WORKERS = 8
+DEFAULT_SIMILARITY = 0.6
+
+NewsEntry = namedtuple('NewsEntry', ['id', 'title', 'published', 'source'])
+
+
+class Feed:
+    """An RSS/Atom feed fetched with ETag and If-Modified-Since.
+
+    A 304 answer skips parsing entirely. Entries are kept by id, so only items that were
+    not in the previous version of the feed are built again; `entries` holds the current
+    ones newest first, with `published` as an aware UTC datetime.
+    """
+
+    def __init__(self, url, name=None, session=None):
+        self.url = url
+        self.name = name or url
+        self.session = session or requests.Session()
+
+        self.etag = None
+        self.modified = None
+        self.entries = []
+
+        self.fetched = 0
+        self.not_modified = 0
+        self.new = 0
+
+        self._seen = {}
+
+    def _entry(self, entry_id, raw):
+        published = raw.get('published_parsed') or raw.get('updated_parsed')
+        if published:
+            published = datetime.fromtimestamp(timegm(published), timezone.utc)
+        else:
+            published = datetime.now(timezone.utc)
+
+        return NewsEntry(entry_id, raw.get('title', ''), published, self.name)
+
+    def fetch(self, timeout=DEFAULT_TIMEOUT):
+        """Fetch the feed, return True if its entries changed."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.modified:
+            headers['If-Modified-Since'] = self.modified
+
+        res = self.session.get(self.url, headers=headers, timeout=timeout)
+        self.fetched += 1
+        if res.status_code == 304:
+            self.not_modified += 1
+            return False
+        res.raise_for_status()
+
+        self.etag = res.headers.get('ETag')
+        self.modified = res.headers.get('Last-Modified')
+
+        seen = {}
+        for raw in feedparser.parse(res.content)['entries']:
+            entry_id = raw.get('id') or raw.get('link') or raw.get('title')
+            if entry_id is None or entry_id in seen:
+                continue
+            if entry_id in self._seen:
+                seen[entry_id] = self._seen[entry_id]
+            else:
+                seen[entry_id] = self._entry(entry_id, raw)
+                self.new += 1
+
+        changed = seen.keys() != self._seen.keys()
+        self._seen = seen
+        self.entries = sorted(seen.values(), key=lambda entry: entry.published, reverse=True)
+
+        return changed
+
+    def stats(self):
+        return {
+            'fetched': self.fetched,
+            'not_modified': self.not_modified,
+            'new': self.new,
+            'entries': len(self.entries)
+        }
+
+
+def _headline_words(title):
+    return frozenset(word for word in re.findall(r'\w+', title.lower()) if len(word) > 2)
+
+
+def similar(a, b, threshold=DEFAULT_SIMILARITY):
+    """Return True if the word sets of two headlines overlap by at least `threshold`."""
+    if not a or not b:
+        return a == b
+
+    return len(a & b) / len(a | b) >= threshold
+
+
+def merge_entries(feeds, limit=DEFAULT_LIMIT, threshold=DEFAULT_SIMILARITY):
+    """Merge the newest-first entry lists of `feeds`, newest first, without near-duplicates.
+
+    The lists are merged lazily through a heap holding one entry per feed, and merging
+    stops as soon as `limit` distinct headlines were found.
+    """
+    merged = heapq.merge(*(feed.entries for feed in feeds), key=lambda entry: entry.published, reverse=True)
+    picked = []
+    words = []
+
+    for entry in merged:
+        entry_words = _headline_words(entry.title)
+        if any(similar(entry_words, other, threshold) for other in words):
+            continue
+
+        picked.append(entry)
+        words.append(entry_words)
+        if len(picked) >= limit:
+            break
+
+    return picked
+
+
+class Aggregator:
+    """Fetch many feeds at once under a deadline and merge their newest entries.
+
+    A feed that has not answered by the deadline keeps its previous entries and is left
+    running in the background; it is not asked again until that fetch returns.
+    """
+
+    def __init__(self, feeds, limit=DEFAULT_LIMIT, deadline=DEFAULT_DEADLINE, workers=DEFAULT_WORKERS):
+        self.feeds = feeds
+        self.limit = limit
+        self.deadline = deadline
+
+        self.failures = 0
+        self.timeouts = 0
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=min(max(len(feeds), 1), workers), thread_name_prefix='news')
+
+    def _fetch(self, feed):
+        try:
+            return feed.fetch(timeout=(min(self.deadline, DEFAULT_TIMEOUT[0]), self.deadline))
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            print('fetching {} failed: {!r}'.format(feed.name, e))
+        finally:
+            with self._lock:
+                del self._pending[feed]
+
+    def _timed_out(self, feed):
+        # a feed is counted once per fetch, however many calls it misses
+        if not self._pending[feed]:
+            self._pending[feed] = True
+            self.timeouts += 1
+
+    def fetch(self):
+        with self._lock:
+            futures = {}
+            for feed in self.feeds:
+                if feed in self._pending:
+                    self._timed_out(feed)
+                    continue
+                self._pending[feed] = False
+                futures[self._executor.submit(self._fetch, feed)] = feed
+
+        _, not_done = wait(futures, self.deadline)
+        with self._lock:
+            for future in not_done:
+                if futures[future] in self._pending:
+                    self._timed_out(futures[future])
+
+        return merge_entries(self.feeds, self.limit)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'feeds': {feed.name: feed.stats() for feed in self.feeds}
+            }
+
+
+def format_news(entries, tz, now=None):
+    """Render entries for the sidebar with times and day differences in `tz`."""
+    if now is None:
+        now = datetime.now(tz)
+    news = []
+
+    for entry in entries:
+        published = entry.published.astimezone(tz)
+        days = (now.date() - published.date()).days
+        news.append({
+            'title': entry.title,
+            'published': published.strftime('%H:%M'),
+            'today': days == 0,
+            'relative': 'vor {}d'.format(days)
+        })
+
+    return news
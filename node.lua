@@ -148,6 +148,7 @@ Weather = (function()
     local wIcon = "sunny"
     local wSunrise = "00:00"
     local wSunset = "00:00"
+    local wStale = false
 
     local function low_temperature()
         return wTemp_low
@@ -173,6 +174,10 @@ Weather = (function()
         return wSunset
     end
 
+    local function stale()
+        return wStale
+    end
+
     util.data_mapper{
         ["weather/icon"] = function(icon)
             print("weather: new icon: ", icon)
@@ -198,6 +203,9 @@ Weather = (function()
             print("weather: new sunset: ", sunset)
             wSunset = sunset
         end;
+        ["weather/stale"] = function(stale)
+            wStale = stale == "1"
+        end;
     }
 
     return {
@@ -207,6 +215,7 @@ Weather = (function()
         icon = icon;
         sunrise = sunrise;
         sunset = sunset;
+        stale = stale;
     }
 end)()
 
@@ -231,6 +240,8 @@ Sidebar = (function()
     local function draw_news()
         local y = 450
         local max_lines = 3
+        -- replayed from the snapshot until the first fetch after a restart
+        local alpha = data.stale and 0.5 or 1
 
         for idx, entry in ipairs(data.news) do
             if idx > 3 then
@@ -238,7 +249,7 @@ Sidebar = (function()
             end
 
             local published_width = _G["font"]:width(entry.published, 45)
-            _G["font"]:write(15, y, entry.published, 45, 0, 0, 0, 1)
+            _G["font"]:write(15, y, entry.published, 45, 0, 0, 0, alpha)
 
             for idx, line in ipairs(wrap(entry.title, 28)) do
                 if idx > max_lines then
@@ -250,12 +261,12 @@ Sidebar = (function()
                 end
 
                 if entry.today then
-                    _G["font"]:write(15 + published_width + 15, y, line, 50, 0, 0, 0, 1)
+                    _G["font"]:write(15 + published_width + 15, y, line, 50, 0, 0, 0, alpha)
                 else
-                    _G["font"]:write(15 + published_width + 15, y, line, 50, 0, 0, 0, 0.8)
+                    _G["font"]:write(15 + published_width + 15, y, line, 50, 0, 0, 0, 0.8 * alpha)
                     if idx == 2 then
                         local relative_width = _G["font"]:width(entry.relative, 35)
-                        _G["font"]:write(15 + (published_width - relative_width) / 2, y - 5, entry.relative, 35, 0, 0, 0, 1)
+                        _G["font"]:write(15 + (published_width - relative_width) / 2, y - 5, entry.relative, 35, 0, 0, 0, alpha)
                     end
                 end
             end
@@ -287,11 +298,12 @@ Sidebar = (function()
             end
 
             -- weather
-            _G["font"]:write(40, 320, Weather.low_temperature(), 70, 0, 0, 0, 1)
+            local weather_alpha = Weather.stale() and 0.5 or 1
+            _G["font"]:write(40, 320, Weather.low_temperature(), 70, 0, 0, 0, weather_alpha)
             local high_width = _G["font"]:width(Weather.high_temperature(), 70)
-            _G["font"]:write(SIDEBAR_WIDTH - high_width - 40, 320, Weather.high_temperature(), 70, 0, 0, 0, 1)
+            _G["font"]:write(SIDEBAR_WIDTH - high_width - 40, 320, Weather.high_temperature(), 70, 0, 0, 0, weather_alpha)
             local current_width = _G["font"]:width(Weather.current_temperature(), 70)
-            _G["font"]:write((SIDEBAR_WIDTH - current_width) / 2, 320, Weather.current_temperature(), 70, 0, 0, 0, 1)
+            _G["font"]:write((SIDEBAR_WIDTH - current_width) / 2, 320, Weather.current_temperature(), 70, 0, 0, 0, weather_alpha)
 
             -- news
             draw_news()
@@ -19,10 +19,10 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import infobeamer
 import os
 import queue
 import re
-import requests
 import signal
 import socket
 import subprocess
@@ -89,6 +89,8 @@ class Radio():
         signal.signal(signal.SIGUSR1, self.sigusr1_handler)
         signal.signal(signal.SIGUSR2, self.sigusr2_handler)
 
+        infobeamer.get_asset_cache().cleanup(os.path.dirname(os.path.realpath(__file__)))
+
     def run(self):
         try:
             os.unlink(self.SOCKET_ADDR)
@@ -119,8 +121,7 @@ class Radio():
                 connection.close()
 
     def ib_notify(self, path, data=''):
-        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        udp.sendto('{}:{}'.format(path, data).encode(), ('127.0.0.1', 4444))
+        infobeamer.notify(path, data)
 
     def prefix_tmp(self, short_name):
         return 'tmp_{}'.format(short_name)
@@ -154,13 +155,7 @@ class Radio():
             self.process.terminate()
             self.process.wait()
 
-        path = '{}/{}.jpeg'.format(os.path.dirname(os.path.realpath(__file__)), self.prefix_tmp(station['short']))
-        if not os.path.isfile(path):
-            res = requests.get(station['image'], stream=True)
-            if res.status_code == 200:
-                with open(path, 'wb') as f:
-                    for chunk in res:
-                        f.write(chunk)
+        infobeamer.fetch_asset(station['image'], os.path.dirname(os.path.realpath(__file__)), self.prefix_tmp(station['short']), 'jpeg', infobeamer.ARTWORK_SIZE)
 
         self.ib_notify('infoscreen/music/title', station['name'])
         self.ib_notify('infoscreen/music/artists')
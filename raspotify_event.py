@@ -20,17 +20,15 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import base64
+import infobeamer
 import json
 import os
 import re
 import requests
-import socket
 import time
 from systemd import journal
 
-udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-config_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'config.json')
+config_path = os.environ.get('INFOSCREEN_CONFIG', os.path.join(os.path.dirname(os.path.realpath(__file__)), 'config.json'))
 with open(config_path) as f:
     config = json.load(f)
     spotify_client_id = config['spotify']['client_id']
@@ -43,15 +41,7 @@ if event == 'change':
     old_track_id = os.environ['OLD_TRACK_ID']
 
 def clear_cache():
-    if event == 'change':
-        path = '{}/tmp_{}.jpeg'.format(os.path.dirname(os.path.realpath(__file__)), old_track_id)
-    else:
-        path = '{}/tmp_{}.jpeg'.format(os.path.dirname(os.path.realpath(__file__)), track_id)
-
-    try:
-        os.remove(path)
-    except OSError:
-        pass
+    infobeamer.get_asset_cache().release(os.path.dirname(os.path.realpath(__file__)), 'tmp_{}'.format(old_track_id if event == 'change' else track_id))
 
 def fetch_track():
     j = journal.Reader()
@@ -88,26 +78,23 @@ def fetch_track():
     image = 'null'
     if image_url:
         image = 'tmp_{}'.format(track_id)
-        res = requests.get(image_url, stream=True)
-        if res.status_code == 200:
-            with open('{}/{}.jpeg'.format(os.path.dirname(os.path.realpath(__file__)), image), 'wb') as f:
-                for chunk in res:
-                    f.write(chunk)
+        if not infobeamer.fetch_asset(image_url, os.path.dirname(os.path.realpath(__file__)), image, 'jpeg', infobeamer.ARTWORK_SIZE):
+            image = 'null'
 
-    udp.sendto('infoscreen/music/title:{}'.format(title).encode(), ('127.0.0.1', 4444))
-    udp.sendto('infoscreen/music/artists:{}'.format(artists).encode(), ('127.0.0.1', 4444))
-    udp.sendto('infoscreen/music/image:{}'.format(image).encode(), ('127.0.0.1', 4444))
+    infobeamer.notify('infoscreen/music/title', title)
+    infobeamer.notify('infoscreen/music/artists', artists)
+    infobeamer.notify('infoscreen/music/image', image)
 
 if event == 'start':
     os.system('killall -SIGUSR1 radio.py')
     fetch_track()
-    udp.sendto('infoscreen/music/playing:true'.encode(), ('127.0.0.1', 4444))
+    infobeamer.notify('infoscreen/music/playing', 'true', flush=True)
 elif event == 'stop':
-    udp.sendto('infoscreen/music/playing:false'.encode(), ('127.0.0.1', 4444))
+    infobeamer.notify('infoscreen/music/playing', 'false', flush=True)
     time.sleep(0.25)
     clear_cache()
 elif event == 'change':
     fetch_track()
-    udp.sendto('infoscreen/music/playing:true'.encode(), ('127.0.0.1', 4444))
+    infobeamer.notify('infoscreen/music/playing', 'true', flush=True)
     time.sleep(0.25)
     clear_cache()
@@ -0,0 +1,154 @@
+"""
+infoscreen: drift-free periodic task scheduler
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+
+
+class Task:
+    """A periodic job and its lateness statistics.
+
+    Run n is due at `start + delay + n * period` plus up to `jitter` seconds, so the time
+    a run takes never shifts the ones after it. Lateness is measured from that due time
+    to the moment a worker actually starts the run.
+    """
+
+    __slots__ = ('name', 'func', 'period', 'jitter', 'delay', 'running', 'runs', 'skipped',
+                 'failures', 'lateness_total', 'lateness_max', 'duration_last', 'duration_max')
+
+    def __init__(self, name, func, period, jitter=0, delay=0):
+        self.name = name
+        self.func = func
+        self.period = period
+        self.jitter = jitter
+        self.delay = delay
+
+        self.running = False
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.lateness_total = 0
+        self.lateness_max = 0
+        self.duration_last = 0
+        self.duration_max = 0
+
+    def stats(self):
+        return {
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'failures': self.failures,
+            'lateness_mean': round(self.lateness_total / self.runs, 4) if self.runs else 0,
+            'lateness_max': round(self.lateness_max, 4),
+            'duration_last': round(self.duration_last, 4),
+            'duration_max': round(self.duration_max, 4)
+        }
+
+
+class Scheduler:
+    """Run tasks at fixed periods on the monotonic clock.
+
+    Tasks are executed on a thread pool so a slow fetch does not hold back the others.
+    A task is never run concurrently with itself: if it is still busy when its next run
+    is due, that run is skipped and counted.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.tasks = {}
+
+        self._queue = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scheduler')
+
+    def add(self, name, func, period, jitter=0, delay=0):
+        task = Task(name, func, period, jitter, delay)
+        self.tasks[name] = task
+
+        return task
+
+    def _push(self, due, slot, task):
+        heapq.heappush(self._queue, (due + random.uniform(0, task.jitter), self._seq, slot, task))
+        self._seq += 1
+
+    def _run(self, task, due):
+        start = time.monotonic()
+        lateness = max(start - due, 0)
+        failed = False
+
+        try:
+            task.func()
+        except Exception as e:
+            failed = True
+            print('task {} failed: {!r}'.format(task.name, e))
+        finally:
+            duration = time.monotonic() - start
+            with self._lock:
+                task.running = False
+                task.runs += 1
+                task.failures += failed
+                task.lateness_total += lateness
+                task.lateness_max = max(task.lateness_max, lateness)
+                task.duration_last = duration
+                task.duration_max = max(task.duration_max, duration)
+
+    def run(self):
+        start = time.monotonic()
+        for task in self.tasks.values():
+            self._push(start + task.delay, 0, task)
+
+        try:
+            while self._queue and not self._stop.is_set():
+                at, _, slot, task = self._queue[0]
+                if self._stop.wait(max(at - time.monotonic(), 0)):
+                    break
+                heapq.heappop(self._queue)
+
+                with self._lock:
+                    busy = task.running
+                    if busy:
+                        task.skipped += 1
+                    else:
+                        task.running = True
+                if not busy:
+                    self._executor.submit(self._run, task, at)
+
+                slot += 1
+                due = start + task.delay + slot * task.period
+                if due < time.monotonic():
+                    missed = int((time.monotonic() - due) // task.period) + 1
+                    with self._lock:
+                        task.skipped += missed
+                    slot += missed
+                    due += missed * task.period
+                self._push(due, slot, task)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {name: task.stats() for name, task in self.tasks.items()}
@@ -28,7 +28,7 @@ class Module(ABC):
         pass
 
     def refresh(self):
-        pass
+        registry.set_ready()
 
     def get_entries(self):
         return []
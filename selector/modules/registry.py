@@ -19,11 +19,14 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import threading
+
 _dispatcher = None
 _selector = None
 _modules = []
 _metadata = []
 _ready_count = 0
+_ready_cond = threading.Condition()
 
 def register_dispatcher(d):
     global _dispatcher
@@ -42,10 +45,26 @@ def register(module, meta):
 def set_ready():
     global _ready_count
 
-    _ready_count += 1
+    with _ready_cond:
+        _ready_count += 1
+        _ready_cond.notify_all()
+
+def reset_ready():
+    global _ready_count
+
+    with _ready_cond:
+        _ready_count = 0
 
 def ready():
-    return _ready_count >= len(_modules)
+    with _ready_cond:
+        return _ready_count >= len(_modules)
+
+def wait_ready(count=None, timeout=None):
+    if count is None:
+        count = len(_modules)
+
+    with _ready_cond:
+        return _ready_cond.wait_for(lambda: _ready_count >= count, timeout)
 
 def module_self_activate(module):
     _dispatcher.self_activate(module)
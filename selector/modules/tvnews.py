@@ -150,8 +150,7 @@ class TVNews(module.Module):
         self.stream_finished()
 
     def refresh(self):
-        for program in PROGRAMS:
-            utils.download_file(utils.prefix_tmp(program['short']), program['picon'])
+        utils.download_files([(utils.prefix_tmp(program['short']), program['picon']) for program in PROGRAMS])
 
         if not os.path.isfile(EPG_PATH):
             DataLoader().fetch(False)
@@ -119,8 +119,7 @@ class TVStreams(module.Module):
         self.stream_finished()
 
     def refresh(self):
-        for channel in CHANNELS:
-            utils.download_file(utils.prefix_tmp(channel['short']), channel['picon'])
+        utils.download_files([(utils.prefix_tmp(channel['short']), channel['picon']) for channel in CHANNELS])
 
         registry.set_ready()
 
@@ -1,7 +1,14 @@
-import json
 import os
-import requests
 import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+import infobeamer
+
+DOWNLOAD_WORKERS = 8
+
+_download_pool = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='download')
 
 
 def get_primary_ip():
@@ -18,52 +25,36 @@ def get_primary_ip():
     return ip
 
 def download_file(name, url):
-    res = requests.head(url)
-    if not res:
-        return None
-
-    if 'content-type' in res.headers:
-        filetype = res.headers['content-type'].split('/')[-1]
-    else:
-        filetype = 'jpg'
-    filename = '{}.{}'.format(name, filetype)
-    path = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), filename)
+    return infobeamer.fetch_asset(url, os.path.dirname(os.path.dirname(os.path.realpath(__file__))), name, size=infobeamer.PICON_SIZE)
 
-    if os.path.isfile(path):
-        return filename
+def download_files(files):
+    futures = [_download_pool.submit(download_file, name, url) for name, url in files]
 
-    res = requests.get(url, stream=True)
-    if not res.ok:
-        return None
+    results = []
+    for (name, url), future in zip(files, futures):
+        # a broken picon must not keep the module from getting ready
+        try:
+            results.append(future.result())
+        except Exception as e:
+            print('downloading {} failed: {!r}'.format(url, e))
+            results.append(None)
 
-    with open(path, 'wb') as f:
-        for chunk in res:
-            f.write(chunk)
+    return results
 
-    return filename
+def cleanup_files():
+    infobeamer.get_asset_cache().cleanup(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
 def prefix_tmp(key):
     return 'tmp_{}'.format(key)
 
 def ib_notify(path, data=''):
-    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    udp.sendto('{}:{}'.format(path, data).encode(), ('127.0.0.1', 4444))
+    # every selector update answers a button press, so skip the coalescing window
+    infobeamer.notify(path, data, flush=True)
 
 def ib_update_selection(selection_id):
     ib_notify('selector/selection', selection_id + 1)
 
 def ib_update_selector(entries, messages=[]):
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect(('127.0.0.1', 4444))
-    s.recv(1000)
-    s.send('selector\n'.encode())
-    s.recv(1000)
-    try:
-        s.send(json.dumps({'entries': entries, 'messages': messages}, ensure_ascii=False).encode('utf8'))
-        s.send('\n'.encode())
-    except:
-        return False
-    finally:
-        s.close()
+    infobeamer.update_entries('selector', entries, messages)
 
     return True
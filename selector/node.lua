@@ -29,6 +29,7 @@ local FSIZE_ENTRY_LARGE = 70
 local base_time = N.base_time or 0
 local selection_id = N.selection_id or 1
 local data = N.data or {entries={}, messages={}}
+local version = N.version
 
 util.data_mapper{
     ["clock/set"] = function(time)
@@ -47,10 +48,45 @@ util.data_mapper{
     end;
 }
 
+local function apply_ops(entries, ops)
+    for idx, op in ipairs(ops) do
+        if op[1] == "del" then
+            table.remove(entries, op[2])
+        elseif op[1] == "ins" then
+            table.insert(entries, op[2], op[3])
+        elseif op[1] == "set" then
+            local entry = entries[op[2]]
+            for key, value in pairs(op[3]) do
+                entry[key] = value
+            end
+            for _, key in ipairs(op[4]) do
+                entry[key] = nil
+            end
+        end
+    end
+end
+
 node.event("input", function(line, client)
-    data = json.decode(line)
+    local update = json.decode(line)
+
+    if update.ops then
+        if update.base ~= version then
+            print("ignoring delta for version " .. tostring(update.base) .. ", have " .. tostring(version))
+            return
+        end
+        apply_ops(data.entries, update.ops)
+        if update.messages then
+            data.messages = update.messages
+        end
+        print("delta update")
+    else
+        data = {entries=update.entries, messages=update.messages}
+        print("data update")
+    end
+
+    version = update.v
     N.data = data
-    print("data update")
+    N.version = version
 
     schedule.update()
 end)
@@ -0,0 +1,149 @@
+#!/usr/bin/python3 -u
+
+"""
+infoscreen: sunrise, sunset and twilight times from the solar position
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Uses the NOAA solar calculator equations, which are accurate to about a minute
+between +/-72 degrees latitude. Run this file to check it against known values.
+"""
+
+import functools
+import sys
+from datetime import date, datetime, timedelta, timezone
+from math import acos, asin, cos, degrees, radians, sin, tan
+
+# zenith angles of the sun's centre, sunrise/sunset includes refraction and the
+# apparent radius of the disc
+ZENITHS = {
+    'sunrise': 90.833,
+    'civil': 96.0,
+    'nautical': 102.0,
+    'astronomical': 108.0
+}
+ITERATIONS = 2
+
+
+def _julian_day(minutes, day):
+    return day.toordinal() + 1721424.5 + minutes / 1440.0
+
+
+def _solar_position(jd):
+    """Return the sun's declination (radians) and the equation of time (minutes)."""
+    t = (jd - 2451545.0) / 36525.0
+
+    mean_long = radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anomaly = radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccentricity = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = (sin(mean_anomaly) * (1.914602 - t * (0.004817 + 0.000014 * t))
+              + sin(2 * mean_anomaly) * (0.019993 - 0.000101 * t)
+              + sin(3 * mean_anomaly) * 0.000289)
+    omega = radians(125.04 - 1934.136 * t)
+    apparent_long = radians(degrees(mean_long) + center - 0.00569 - 0.00478 * sin(omega))
+
+    obliquity = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliquity = radians(obliquity + 0.00256 * cos(omega))
+    declination = asin(sin(obliquity) * sin(apparent_long))
+
+    y = tan(obliquity / 2) ** 2
+    equation_of_time = 4 * degrees(
+        y * sin(2 * mean_long)
+        - 2 * eccentricity * sin(mean_anomaly)
+        + 4 * eccentricity * y * sin(mean_anomaly) * cos(2 * mean_long)
+        - 0.5 * y * y * sin(4 * mean_long)
+        - 1.25 * eccentricity * eccentricity * sin(2 * mean_anomaly))
+
+    return declination, equation_of_time
+
+
+def _event(day, lat, lng, zenith, sign):
+    """Minutes after 00:00 UTC of `day` at which the sun crosses `zenith`, or None.
+
+    `sign` is -1 for the morning and +1 for the evening crossing, 0 gives solar noon.
+    """
+    minutes = 720 - 4 * lng
+    for _ in range(ITERATIONS + 1):
+        declination, equation_of_time = _solar_position(_julian_day(minutes, day))
+        noon = 720 - 4 * lng - equation_of_time
+        if not sign:
+            minutes = noon
+            continue
+
+        cos_hour_angle = (cos(radians(zenith)) / (cos(radians(lat)) * cos(declination))
+                          - tan(radians(lat)) * tan(declination))
+        if not -1 <= cos_hour_angle <= 1:
+            return None
+        minutes = noon + sign * 4 * degrees(acos(cos_hour_angle))
+
+    return minutes
+
+
+@functools.lru_cache(maxsize=16)
+def sun_times(day, lat, lng, tz=timezone.utc):
+    """Return the twilight, sunrise, noon and sunset times of `day` in `tz`.
+
+    Keys are `astronomical_dawn`, `nautical_dawn`, `civil_dawn`, `sunrise`, `noon`,
+    `sunset`, `civil_dusk`, `nautical_dusk` and `astronomical_dusk`. An event is None if
+    the sun does not reach that elevation on `day` (polar day or night).
+    """
+    midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+    def at(minutes):
+        return None if minutes is None else (midnight + timedelta(minutes=minutes)).astimezone(tz)
+
+    times = {'noon': at(_event(day, lat, lng, 90, 0))}
+    for name, zenith in ZENITHS.items():
+        dawn, dusk = ('sunrise', 'sunset') if name == 'sunrise' else (name + '_dawn', name + '_dusk')
+        times[dawn] = at(_event(day, lat, lng, zenith, -1))
+        times[dusk] = at(_event(day, lat, lng, zenith, 1))
+
+    return times
+
+
+KNOWN_VALUES = [
+    # place, lat, lng, timezone, date, civil dawn, sunrise, sunset, civil dusk
+    ('München', 48.137, 11.575, 'Europe/Berlin', '2018-03-20', '05:46', '06:17', '18:26', '18:58'),
+    ('München', 48.137, 11.575, 'Europe/Berlin', '2018-06-21', '04:31', '05:14', '21:17', '22:00'),
+    ('München', 48.137, 11.575, 'Europe/Berlin', '2018-09-23', '06:30', '07:02', '19:10', '19:41'),
+    ('München', 48.137, 11.575, 'Europe/Berlin', '2018-12-21', '07:24', '08:02', '16:22', '16:59'),
+    ('New York', 40.7128, -74.006, 'America/New_York', '2018-06-21', '04:51', '05:25', '20:30', '21:05'),
+    ('Sydney', -33.8688, 151.2093, 'Australia/Sydney', '2018-12-21', '05:11', '05:41', '20:05', '20:35'),
+    ('Quito', -0.18, -78.47, 'America/Guayaquil', '2018-03-20', '05:57', '06:18', '18:24', '18:45')
+]
+
+
+def main():
+    import pytz
+
+    failed = 0
+    for place, lat, lng, tz, day, *expected in KNOWN_VALUES:
+        times = sun_times(date(*map(int, day.split('-'))), lat, lng, pytz.timezone(tz))
+        for key, value in zip(('civil_dawn', 'sunrise', 'sunset', 'civil_dusk'), expected):
+            hour, minute = map(int, value.split(':'))
+            actual = times[key]
+            error = abs(actual.hour * 60 + actual.minute + actual.second / 60 - (hour * 60 + minute))
+            if error > 1.5:
+                failed += 1
+                print('{} {} {}: expected {}, got {}'.format(place, day, key, value, actual.strftime('%H:%M:%S')))
+
+    print('{} of {} known values off by more than a minute'.format(failed, len(KNOWN_VALUES) * 4))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
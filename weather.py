@@ -0,0 +1,381 @@
+"""
+infoscreen: weather providers for the sidebar
+
+ Copyright (C) 2018 Hendrik Hagendorn
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from lxml import etree
+
+DEFAULT_TTL = 600
+DEFAULT_DEADLINE = 10
+DEFAULT_TIMEOUT = (5, 10)
+
+WETTER24_URL = 'http://www.wetter24.de/vorhersage/deutschland/m%C3%BCnchen/18225562/'
+WETTER24_MAPPING = {
+    'sonnig': 'sunny',
+    'heiter': 'sunny',
+    'heiter, Regenschauer': 'partlycloudy',
+    'wolkig': 'partlycloudy',
+    'wolkig, leichter Sprühregen': 'partlycloudy',
+    'wolkig, leichter Regen': 'rainy',
+    'wolkig, Regenschauer': 'rainy',
+    'wolkig, Gewitter': 'rainy',
+    'wolkig, Schneeregenschauer': 'rainy',
+    'wolkig, Schneeschauer': 'snowcloud',
+    'bedeckt': 'cloudy',
+    'bedeckt, Sprühregen': 'rainy',
+    'bedeckt, leichter Sprühregen': 'cloudy',
+    'bedeckt, leichter Regen': 'rainy',
+    'bedeckt, mäßiger Regen': 'rainy',
+    'bedeckt, Regenschauer': 'rainy',
+    'bedeckt, Schneeregen': 'rainy',
+    'bedeckt, Schneeregenschauer': 'rainy',
+    'bedeckt, Schneeschauer': 'snowing',
+    'bedeckt, leichter Schneefall': 'snowing',
+    'bedeckt, mäßiger Schneefall': 'snowing',
+    'stark bewölkt': 'cloudy',
+    'stark bewölkt, gewittrig': 'rainy',
+    'stark bewölkt, Regenschauer': 'rainy',
+    'stark bewölkt, leichter Regen': 'rainy',
+    'stark bewölkt, starker Regen': 'rainy',
+    'regen': 'rainy',
+    'schnee': 'snowing',
+    'neblig': 'foggy'
+}
+
+# evaluated on each candidate element as the pull parser closes it, so only the
+# ancestors of that element are searched instead of the whole document
+WETTER24_FIELDS = {
+    't_current': etree.XPath('self::span[@class="temp_val"][ancestor::li[@class="temp"]]/text()'),
+    't_low': etree.XPath('self::td[starts-with(@class,"tempvn")]/text()'),
+    't_high': etree.XPath('self::td[starts-with(@class,"tempvx")]/text()'),
+    'icon': etree.XPath('self::img[@width="72" and @alt="symbol"]/@title')
+}
+WETTER24_TAGS = ('span', 'td', 'img')
+WETTER24_CHUNK_SIZE = 16 * 1024
+
+WUNDERGROUND_URL = 'http://api.wunderground.com/api/{}/{}/q/{},{}.json'
+WUNDERGROUND_MAPPING = {
+    'chanceflurries': 'rainy',
+    'chancerain': 'partlycloudy',
+    'chancesleet': 'rainy',
+    'chancesnow': 'snowing',
+    'chancetstorms': 'rainy',
+    'clear': 'sunny',
+    'cloudy': 'cloudy',
+    'flurries': 'rainy',
+    'fog': 'foggy',
+    'mostlycloudy': 'partlycloudy',
+    'mostlysunny': 'sunny',
+    'partlycloudy': 'partlycloudy',
+    'partlysunny': 'partlycloudy',
+    'sleet': 'rainy',
+    'rain': 'rainy',
+    'snow': 'snowing',
+    'sunny': 'sunny',
+    'tstorms': 'rainy'
+}
+
+OPEN_METEO_URL = 'https://api.open-meteo.com/v1/forecast'
+# WMO weather interpretation codes, see https://open-meteo.com/en/docs
+OPEN_METEO_MAPPING = {
+    0: 'sunny',
+    1: 'sunny',
+    2: 'partlycloudy',
+    3: 'cloudy',
+    45: 'foggy',
+    48: 'foggy',
+    51: 'partlycloudy',
+    53: 'rainy',
+    55: 'rainy',
+    56: 'rainy',
+    57: 'rainy',
+    61: 'rainy',
+    63: 'rainy',
+    65: 'rainy',
+    66: 'rainy',
+    67: 'rainy',
+    71: 'snowing',
+    73: 'snowing',
+    75: 'snowing',
+    77: 'snowing',
+    80: 'rainy',
+    81: 'rainy',
+    82: 'rainy',
+    85: 'snowcloud',
+    86: 'snowing',
+    95: 'rainy',
+    96: 'rainy',
+    99: 'rainy'
+}
+
+
+class LayoutError(Exception):
+    """The page was fetched but the expected elements are missing."""
+
+
+def parse_wetter24(chunks, encoding=None):
+    """Scrape the current weather from a wetter24 forecast page given as byte chunks.
+
+    Parsing stops at the first chunk that completes all fields, so the rest of the
+    page is neither parsed nor, when streaming a response, downloaded.
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag=WETTER24_TAGS, encoding=encoding)
+    missing = dict(WETTER24_FIELDS)
+    found = {}
+
+    def read_events():
+        for _, element in parser.read_events():
+            for field, xpath in list(missing.items()):
+                value = xpath(element)
+                if value:
+                    found[field] = value[0].strip()
+                    del missing[field]
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        read_events()
+        if not missing:
+            break
+    else:
+        parser.close()
+        read_events()
+
+    if missing:
+        raise LayoutError('wetter24 layout changed, not found: {}'.format(', '.join(sorted(missing))))
+
+    found['icon'] = WETTER24_MAPPING.get(found['icon'], 'sunny')
+
+    return found
+
+
+def format_temperatures(current, low, high):
+    return {
+        't_current': '{} °C'.format(round(current)),
+        't_low': '{}°C'.format(round(low)),
+        't_high': '{}°C'.format(round(high))
+    }
+
+
+class Provider(ABC):
+    """A source of the current weather.
+
+    `fetch()` returns a dict with `t_current`, `t_low`, `t_high` and `icon` or raises.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.latency_last = 0
+        self.latency_total = 0
+
+    @abstractmethod
+    def fetch(self):
+        pass
+
+    def stats(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'latency_last': round(self.latency_last, 3),
+            'latency_mean': round(self.latency_total / self.runs, 3) if self.runs else 0
+        }
+
+
+class Wetter24Provider(Provider):
+    name = 'wetter24'
+
+    def __init__(self, url=WETTER24_URL):
+        super().__init__()
+        self.url = url
+
+    def fetch(self):
+        with self.session.get(self.url, stream=True, timeout=DEFAULT_TIMEOUT) as res:
+            res.raise_for_status()
+            encoding = res.encoding if 'charset' in res.headers.get('Content-Type', '') else None
+
+            return parse_wetter24(res.iter_content(WETTER24_CHUNK_SIZE), encoding)
+
+
+class OpenMeteoProvider(Provider):
+    name = 'open-meteo'
+
+    def __init__(self, lat, lng):
+        super().__init__()
+        self.params = {
+            'latitude': lat,
+            'longitude': lng,
+            'current_weather': 'true',
+            'daily': 'temperature_2m_min,temperature_2m_max,weathercode',
+            'forecast_days': 1,
+            'timezone': 'auto'
+        }
+
+    def fetch(self):
+        res = self.session.get(OPEN_METEO_URL, params=self.params, timeout=DEFAULT_TIMEOUT)
+        res.raise_for_status()
+        data = res.json()
+
+        data, daily = data['current_weather'], data['daily']
+        weather = format_temperatures(data['temperature'], daily['temperature_2m_min'][0], daily['temperature_2m_max'][0])
+        weather['icon'] = OPEN_METEO_MAPPING.get(daily['weathercode'][0], 'sunny')
+
+        return weather
+
+
+class WundergroundProvider(Provider):
+    name = 'wunderground'
+
+    def __init__(self, api_key, lat, lng):
+        super().__init__()
+        self.api_key = api_key
+        self.lat = lat
+        self.lng = lng
+
+    def _get(self, feature):
+        res = self.session.get(WUNDERGROUND_URL.format(self.api_key, feature, self.lat, self.lng), timeout=DEFAULT_TIMEOUT)
+        res.raise_for_status()
+
+        return res.json()
+
+    def fetch(self):
+        forecast = self._get('forecast')['forecast']['simpleforecast']['forecastday'][0]
+        conditions = self._get('conditions')['current_observation']
+
+        weather = format_temperatures(conditions['temp_c'], float(forecast['low']['celsius']),
+                                      float(forecast['high']['celsius']))
+        weather['icon'] = WUNDERGROUND_MAPPING.get(forecast['icon'], 'sunny')
+
+        return weather
+
+
+class Weather:
+    """Ask all providers at once and keep the first good answer for `ttl` seconds.
+
+    Providers that have not answered within `deadline` seconds are left running in the
+    background and skipped until they return. If no provider delivers, the last good
+    value is returned again, so the sidebar keeps showing it.
+    """
+
+    def __init__(self, providers, ttl=DEFAULT_TTL, deadline=DEFAULT_DEADLINE):
+        self.providers = providers
+        self.ttl = ttl
+        self.deadline = deadline
+
+        self.value = None
+        self.provider = None
+        self.fetched = None
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(len(providers), 1), thread_name_prefix='weather')
+
+    def _fetch(self, provider):
+        start = time.monotonic()
+        failed = False
+
+        try:
+            return provider.fetch()
+        except Exception as e:
+            failed = True
+            print('weather provider {} failed: {!r}'.format(provider.name, e))
+            raise
+        finally:
+            latency = time.monotonic() - start
+            with self._lock:
+                provider.runs += 1
+                provider.failures += failed
+                provider.latency_last = latency
+                provider.latency_total += latency
+                del self._pending[provider]
+
+    def _timed_out(self, provider):
+        # a provider is counted once per fetch, however many calls it misses
+        if not self._pending[provider]:
+            self._pending[provider] = True
+            provider.timeouts += 1
+
+    def get(self):
+        if self.fetched is not None and time.monotonic() - self.fetched < self.ttl:
+            return self.value
+
+        futures = {}
+        with self._lock:
+            for provider in self.providers:
+                if provider in self._pending:
+                    self._timed_out(provider)
+                    continue
+                self._pending[provider] = False
+                futures[self._executor.submit(self._fetch, provider)] = provider
+
+        deadline = time.monotonic() + self.deadline
+        while futures:
+            done, _ = wait(futures, max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+
+            for future in done:
+                provider = futures.pop(future)
+                if future.exception() is None:
+                    self.value = future.result()
+                    self.provider = provider.name
+                    self.fetched = time.monotonic()
+
+                    return self.value
+
+        with self._lock:
+            for provider in futures.values():
+                if provider in self._pending:
+                    self._timed_out(provider)
+        print('all weather providers failed, keeping the last value from {}.'.format(self.provider))
+
+        return self.value
+
+    def stale(self):
+        """True if the current value is older than `ttl`, i.e. its refresh failed."""
+        return self.fetched is None or time.monotonic() - self.fetched > self.ttl
+
+    def stats(self):
+        with self._lock:
+            return {provider.name: provider.stats() for provider in self.providers}
+
+
+def create_providers(names, config):
+    lat = config['coordinates']['lat']
+    lng = config['coordinates']['lng']
+    api_key = config.get('wunderground', {}).get('api_key')
+
+    providers = []
+    for name in names:
+        if name == Wetter24Provider.name:
+            providers.append(Wetter24Provider())
+        elif name == OpenMeteoProvider.name and lat and lng:
+            providers.append(OpenMeteoProvider(lat, lng))
+        elif name == WundergroundProvider.name and api_key and lat and lng:
+            providers.append(WundergroundProvider(api_key, lat, lng))
+
+    return providers